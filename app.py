@@ -6,82 +6,185 @@ Includes ALL features: payments, admin endpoints, Redis optimization, etc.
 """
 
 import os
+
+# Under gunicorn's gevent worker (WEB_WORKER_CLASS=gevent) the stdlib is already monkey-patched
+# before this import; psycopg2 is a C extension, so make its waits cooperative as well.
+try:
+    from gevent import monkey as _gevent_monkey
+    if _gevent_monkey.is_module_patched("socket"):
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+except ImportError:
+    pass
+
 import time
 import json
-import tempfile
-import mimetypes
-import traceback
-import openai 
-from datetime import datetime, timedelta
-from urllib.parse import urlparse, unquote
+import threading
+import logging
+import logging.handlers
+import atexit
+import sys
+import functools
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from queue import SimpleQueue, Empty
+from io import BytesIO
+from contextlib import suppress
+from datetime import datetime
 import hashlib
-import requests
-from flask import Flask, request, jsonify, render_template
+import uuid
+from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask.json.provider import DefaultJSONProvider
+from decimal import Decimal
 from dotenv import load_dotenv
-from twilio.rest import Client as TwilioClient
-from mutagen import File as MutagenFile
-from utils import send_whatsapp
-from openai_client_multilang import transcribe_file_multilang, summarize_text_multilang
+from utils import send_whatsapp, send_whatsapp_async, get_twilio_client, TEMP_DIR, temp_dir_free_bytes, TTLCache, HTTP_SESSION, read_audio_length
 from redis_conn import get_redis_conn_or_raise, get_queue, get_redis_url
-from redis import from_url
 from db_helpers import get_meeting_status, get_meeting_detail
 from werkzeug.utils import secure_filename
-from smart_followups import get_user_completion_score 
+from werkzeug.exceptions import HTTPException
 
 
 
 # Import DB and payments (same as original)
-from db import (init_db, get_conn, get_or_create_user, get_remaining_minutes, deduct_minutes, save_meeting_notes, save_meeting_notes_with_sid, save_user, decrement_minutes_if_available, set_subscription_active)
-from db_multilang import init_multilang_db, set_user_language, get_user_language
-from language_handler_v2 import get_language_menu, parse_language_choice, get_language_name
+from db import init_db
+from db_multilang import init_multilang_db
+from language_handler_v2 import parse_language_choice, get_language_name
 import re
-from payments import create_payment_link_for_phone, handle_webhook_event, verify_razorpay_webhook
-from db import set_user_state, get_user_state, update_user_language
+from payments import handle_webhook_event, read_and_verify_razorpay_webhook
 
 # New imports for API endpoints
 from db import (
-    get_or_create_user, save_meeting_notes_with_sid, get_conn,
-    create_task, get_tasks_for_user, get_user_by_phone
+    save_meeting_notes_with_sid, get_conn,
+    get_tasks_for_user, get_user_by_phone, execute_prepared, update_pending_states,
+    get_cursor, create_reminders_bulk, mark_task_done
+)
+from encryption import decrypt_sensitive_data
+from meeting_jobs import (
+    SUMMARY_INSTRUCTIONS, TRANSLATE_INSTRUCTIONS, llm_cache_key, llm_cache_get,
+    save_meeting_summary, summarize_meeting_job, translate_meeting_job, extract_actions_job,
+    meeting_cache_key, meeting_cache_get, meeting_cache_set, invalidate_meeting_cache,
+    fetch_translation_source
 )
-from encryption import encrypt_sensitive_data, decrypt_sensitive_data
-from openai_client_multilang import summarize_text_multilang, transcribe_file_multilang
 
-if "GOOGLE_APPLICATION_CREDENTIALS_JSON" in os.environ:
-    creds = json.loads(os.environ["GOOGLE_APPLICATION_CREDENTIALS_JSON"])
-    creds_path = "/tmp/gcs_creds.json"
-    with open(creds_path, "w") as f:
-        json.dump(creds, f)
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = creds_path
+# media_jobs also materialises GOOGLE_APPLICATION_CREDENTIALS_JSON for the GCS client
+from media_jobs import handle_incoming_media, sign_gcs_url, sign_gcs_urls, upload_stream_to_gcs, get_gcs_client
 
-from google.cloud import storage
+# Feature modules used by request handlers, resolved once here instead of per request.
+# Lenient like the old in-handler imports: a module that can't import only disables its handlers.
+try:
+    from whatsapp_features import handle_numbered_response
+except ImportError as e:
+    logging.getLogger("mina.app").warning("whatsapp_features unavailable: %s", e)
+    handle_numbered_response = None
+try:
+    from advanced_features import parse_task_completion_response, get_tasks_grouped_by_project
+except ImportError as e:
+    logging.getLogger("mina.app").warning("advanced_features unavailable: %s", e)
+    parse_task_completion_response = get_tasks_grouped_by_project = None
+try:
+    from custom_reminders import extract_custom_reminders
+except ImportError as e:
+    logging.getLogger("mina.app").warning("custom_reminders unavailable: %s", e)
+    extract_custom_reminders = None
 
 # ---- Pending State Helpers ----
 
-def get_pending_state_by_phone(phone):
+# Latest (meeting_id, pending_state, pending summary job) per phone. Kept short-lived because
+# the worker also writes pending_state / new meeting rows and can't invalidate this process's copy.
+_pending_state_cache = TTLCache(maxsize=10000, ttl=int(os.getenv("PENDING_STATE_CACHE_TTL", "5")))
+
+def get_reply_context_by_phone(phone):
+    """
+    Everything a numbered reply needs, in one round-trip:
+    (meeting_id, pending_state) of the latest meeting, plus the latest meeting awaiting a
+    summary-language choice as {"meeting_id", "detected_language"} (or None).
+    """
+    cached = _pending_state_cache.get(phone)
+    if cached is not None:
+        return cached
     with get_conn() as conn, conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT id, pending_state
-            FROM meeting_notes
-            WHERE phone=%s
-            ORDER BY id DESC
-            LIMIT 1
-            """,
-            (phone,)
-        )
+        execute_prepared(cur, "reply_context", (phone, phone))
         row = cur.fetchone()
-        if row:
-            return row[0], row[1]
-        return None, None
+    pending_job = {"meeting_id": row[2], "detected_language": row[3]} if row[2] is not None else None
+    result = (row[0], row[1], pending_job)
+    _pending_state_cache.set(phone, result)
+    return result
 
 
-def set_pending_state(meeting_id, state):
-    with get_conn() as conn, conn.cursor() as cur:
-        cur.execute(
-            "UPDATE meeting_notes SET pending_state=%s WHERE id=%s",
-            (state, meeting_id)
-        )
-        conn.commit()
+def get_pending_state_by_phone(phone):
+    meeting_id, pending_state, _ = get_reply_context_by_phone(phone)
+    return meeting_id, pending_state
+
+
+# Write-behind for pending_state: the webhook enqueues and returns; a background thread
+# applies updates in batches (up to PENDING_WRITE_BATCH rows or PENDING_WRITE_WINDOW seconds).
+# A failed batch is kept and retried with backoff, merged with newer writes (newest wins).
+PENDING_WRITE_BATCH = 100
+PENDING_WRITE_WINDOW = 0.05
+PENDING_WRITE_RETRY_MIN_SECONDS = 0.5
+PENDING_WRITE_RETRY_MAX_SECONDS = 30
+_pending_writes = SimpleQueue()
+_unwritten_pending = {}  # meeting_id -> state of the batch being written / retried
+
+def _pending_state_writer():
+    batch = _unwritten_pending
+    backoff = PENDING_WRITE_RETRY_MIN_SECONDS
+    while True:
+        if not batch:
+            meeting_id, state = _pending_writes.get()
+            batch[meeting_id] = state
+        deadline = time.monotonic() + PENDING_WRITE_WINDOW
+        while len(batch) < PENDING_WRITE_BATCH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                meeting_id, state = _pending_writes.get(timeout=remaining)
+            except Empty:
+                break
+            batch[meeting_id] = state  # last write per meeting wins
+        try:
+            update_pending_states(list(batch.items()))
+        except Exception as e:
+            logger.exception("pending_state write-behind failed for %s rows, retrying in %.1fs: %s", len(batch), backoff, e)
+            time.sleep(backoff)
+            backoff = min(backoff * 2, PENDING_WRITE_RETRY_MAX_SECONDS)
+            continue
+        batch.clear()
+        backoff = PENDING_WRITE_RETRY_MIN_SECONDS
+
+def _flush_pending_writes():
+    """Apply whatever is still queued or awaiting retry (called at interpreter exit)."""
+    batch = dict(_unwritten_pending)
+    while True:
+        try:
+            meeting_id, state = _pending_writes.get_nowait()
+        except Empty:
+            break
+        batch[meeting_id] = state
+    if batch:
+        try:
+            update_pending_states(list(batch.items()))
+        except Exception as e:
+            logger.exception("pending_state flush at exit lost %s rows: %s", len(batch), e)
+
+
+def set_pending_state(meeting_id, state, phone=None):
+    """
+    Queue a pending_state change; it normally reaches Postgres within ~PENDING_WRITE_WINDOW
+    (longer while a failed batch is being retried). Until then other gunicorn workers and the
+    RQ worker still read the old value from the DB - fine for the clear-after-choice transitions
+    the webhook makes, but a state another process must act on immediately should be written
+    with update_pending_states() directly.
+    """
+    _pending_writes.put((meeting_id, state))
+    if phone:
+        # keep this process's view consistent until the write lands
+        cached = _pending_state_cache.get(phone)
+        if cached is not None and cached[0] == meeting_id:
+            _pending_state_cache.set(phone, (meeting_id, state, cached[2]))
+        else:
+            _pending_state_cache.pop(phone)
 
 
 # --- Optional Billing Plugin ---
@@ -103,6 +206,59 @@ BILLING_INTENT_MAP = {
 # Load environment (same as original)
 load_dotenv()
 
+# Logging: records go through a queue and are written to stderr by a background
+# listener thread, so handlers never block on stdout. DEBUG calls are dropped
+# cheaply unless LOG_LEVEL=DEBUG. Attached to the "mina" parent so the job / helper
+# module loggers (mina.meeting_jobs, mina.db_helpers, ...) share the same path.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+_mina_logger = logging.getLogger("mina")
+_mina_logger.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+_mina_logger.propagate = False
+logger = logging.getLogger("mina.app")
+_log_queue = SimpleQueue()
+_log_stream_handler = logging.StreamHandler(sys.stderr)
+_log_stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s", "%Y-%m-%d %H:%M:%S"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_stream_handler)
+
+class _DuplicateErrorFilter(logging.Filter):
+    """
+    Under an error storm, let one record per (call site, exception type) through every
+    LOG_DEDUPE_SECONDS and count the rest; the next one that passes reports how many were
+    dropped. Runs before QueueHandler formats the traceback, so dropped records cost ~nothing.
+    """
+    def __init__(self, interval):
+        super().__init__()
+        self.interval = interval
+        self._last = TTLCache(maxsize=1024, ttl=max(interval, 1) * 60)
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING or self.interval <= 0:
+            return True
+        exc_type = record.exc_info[0].__name__ if record.exc_info and record.exc_info[0] else None
+        key = (record.pathname, record.lineno, exc_type)
+        now = time.monotonic()
+        with self._lock:
+            last_at, suppressed = self._last.get(key, (0.0, 0))
+            if now - last_at < self.interval:
+                self._last.set(key, (last_at, suppressed + 1))
+                return False
+            self._last.set(key, (now, 0))
+        if suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar suppressed]"
+        return True
+
+_log_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_log_queue_handler.addFilter(_DuplicateErrorFilter(float(os.getenv("LOG_DEDUPE_SECONDS", "1"))))
+_mina_logger.addHandler(_log_queue_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# pending_state writer starts once logging is wired up; its exit flush is registered after the
+# listener so it runs first (atexit is LIFO) and any flush error still gets logged
+threading.Thread(target=_pending_state_writer, name="pending-state-writer", daemon=True).start()
+atexit.register(_flush_pending_writes)
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
@@ -115,48 +271,79 @@ LANGUAGE = os.getenv("LANGUAGE", "en")
 DATABASE_URL = os.getenv("DATABASE_URL")
 DEFAULT_SUBSCRIPTION_MINUTES = float(os.getenv("DEFAULT_SUBSCRIPTION_MINUTES", "30.0"))
 
-# Twilio client
+# Twilio client (the same pooled instance utils.send_whatsapp uses)
 twilio_client = None
 if TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN:
     try:
-        twilio_client = TwilioClient(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+        twilio_client = get_twilio_client()
     except Exception as e:
-        print("Failed to init Twilio client:", e)
+        logger.warning("Failed to init Twilio client: %s", e)
 
 # Ensure DB schema exists (safe to call)
 try:
     init_db()
     init_multilang_db()
-    print("Database and multi-language support initialized")
+    logger.info("Database and multi-language support initialized")
 except Exception as e:
-    print("init_db() failed:", e)
+    logger.error("init_db() failed: %s", e)
 
 # Get the directory where this script is located
-import os
 script_dir = os.path.dirname(os.path.abspath(__file__))
 template_dir = os.path.join(script_dir, 'templates')
 static_dir = os.path.join(script_dir, 'static')
 
 app = Flask(__name__, template_folder=template_dir, static_folder=static_dir)
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # optional speedup; stdlib json provider stays in place
+    orjson = None
+    _json_loads = json.loads
+
+def _orjson_default(o):
+    # orjson handles datetime/date/UUID/dataclasses natively; keep Flask's Decimal -> str
+    if isinstance(o, Decimal):
+        return str(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+class OrjsonProvider(DefaultJSONProvider):
+    """jsonify()/request.get_json() via orjson: C-level encoding, bytes straight into the response."""
+    _OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_orjson_default, option=self._OPTIONS).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_orjson_default, option=self._OPTIONS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+if orjson:
+    app.json = OrjsonProvider(app)
+# Werkzeug rejects larger request bodies while parsing, before anything is written to disk
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(100 * 1024 * 1024)))
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
+
 # Initialize scheduled reminders
 from scheduler_setup import init_scheduler
 init_scheduler(app)
 
 # Subscription routes removed - using direct links
 
-# Create temp directory for audio files
-TEMP_DIR = os.getenv("TEMP_DIR", os.getcwd())
-os.makedirs(TEMP_DIR, exist_ok=True)
+# Temp directory for audio files: TEMP_DIR (utils) - tmpfs when available, created on import
 
 # Initialize Redis safely after Flask app is created
 try:
     redis_conn = get_redis_conn_or_raise()
     queue = get_queue()
     redis_url = get_redis_url()
-    print("Redis connection and queue initialized.")
+    logger.info("Redis connection and queue initialized.")
 except Exception as e:
-    print("Failed to initialize Redis:", e)
+    logger.warning("Failed to initialize Redis: %s", e)
     redis_conn = None
     queue = None
     redis_url = None
@@ -179,52 +366,9 @@ def handle_audio_from_gcs(sender, gcs_path):
 
 # Utility functions (same as original)
 def debug_print(*args, **kwargs):
-    """Simple wrapper for prints so we can change later to logging."""
-    print(*args, **kwargs)
-
-def _ext_from_content_type(ct: str):
-    if not ct:
-        return None
-    ct = ct.split(";")[0].strip().lower()
-    mapping = {
-        "audio/mpeg": ".mp3", "audio/mp3": ".mp3", "audio/mp4": ".m4a", "audio/x-m4a": ".m4a",
-        "audio/mp4a-latm": ".m4a", "audio/aac": ".aac", "audio/wav": ".wav", "audio/x-wav": ".wav",
-        "audio/ogg": ".ogg", "audio/opus": ".opus", "audio/webm": ".webm", "audio/amr": ".amr",
-        "audio/3gpp": ".3gp", "video/3gpp": ".3gp", "video/mp4": ".mp4", "audio/x-caf": ".caf", "audio/x-aiff": ".aiff"
-    }
-    return mapping.get(ct)
-
-def download_file(url, fallback_ext=".m4a"):
-    """Download the media URL to a temporary file. Preserve extension based on Content-Type header if possible. Returns local path."""
-    try:
-        resp = requests.get(url, stream=True, timeout=60)
-        resp.raise_for_status()
-    except Exception as e:
-        debug_print("download_file: request failed:", e)
-        raise
-
-    ct = resp.headers.get("Content-Type", "")
-    ext = _ext_from_content_type(ct)
-    if not ext:
-        path = unquote(urlparse(url).path)
-        guessed = os.path.splitext(path)[1]
-        ext = guessed if guessed else fallback_ext
-
-    fname = f"incoming_{int(time.time())}{ext}"
-    tmp_path = os.path.join(TEMP_DIR, fname)
-
-    try:
-        with open(tmp_path, "wb") as f:
-            for chunk in resp.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-    except Exception as e:
-        debug_print("download_file: writing file failed:", e)
-        raise
-
-    debug_print(f"Downloading media from: {url}")
-    debug_print(f"Saved media to: {tmp_path}  (Content-Type: {ct}, ext used: {ext})")
-    return tmp_path
+    """Debug-level log line; args are only joined into a message when DEBUG is enabled."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(" ".join(str(a) for a in args))
 
 def dispatch_intent(intent: str, entities: dict, context: dict):
     """
@@ -246,59 +390,6 @@ def dispatch_intent(intent: str, entities: dict, context: dict):
     return None
 
 
-def download_media_to_local(url, fallback_ext=".m4a"):
-    """Download Twilio media (with Basic Auth if needed) to temp file and return local path."""
-    if not url:
-        debug_print("download_media_to_local: no url")
-        return None
-    try:
-        auth = None
-        parsed = urlparse(url)
-        if "twilio.com" in parsed.netloc and TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN:
-            auth = (TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        resp = requests.get(url, stream=True, timeout=60, auth=auth)
-        resp.raise_for_status()
-    except Exception as e:
-        debug_print("download_media_to_local: request failed:", e)
-        return None
-
-    ct = resp.headers.get("Content-Type", "")
-    ext = _ext_from_content_type(ct) or os.path.splitext(unquote(parsed.path))[1] or fallback_ext
-    tmp_path = os.path.join(TEMP_DIR, f"temp_audio_{int(time.time())}{ext}")
-    try:
-        with open(tmp_path, "wb") as f:
-            for chunk in resp.iter_content(8192):
-                if chunk:
-                    f.write(chunk)
-        debug_print(f"Saved media to {tmp_path} (Content-Type: {ct})")
-        return tmp_path
-    except Exception as e:
-        debug_print("download_media_to_local: write failed:", e)
-        return None
-
-def get_audio_duration_seconds(path: str) -> float:
-    """Get audio duration with support for all Android/iOS formats."""
-    try:
-        mf = MutagenFile(path)
-        if mf and hasattr(mf, 'info') and hasattr(mf.info, 'length'):
-            return float(mf.info.length)
-    except Exception as e:
-        debug_print("Mutagen parsing failed:", e)
-    
-    try:
-        size_bytes = os.path.getsize(path)
-        ext = path.lower().split('.')[-1]
-        bitrate_map = {
-            'ogg': 64000, 'opus': 64000, 'm4a': 96000, 'aac': 96000, 'mp3': 128000,
-            'wav': 1411200, 'amr': 12200, '3gp': 12200, 'webm': 64000, 'mp4': 96000
-        }
-        bitrate = bitrate_map.get(ext, 96000)
-        seconds = (size_bytes * 8) / bitrate
-        return max(seconds, 1.0)
-    except Exception as e2:
-        debug_print("File size fallback failed:", e2)
-        return 30.0
-
 def format_minutes_for_whatsapp(result: dict) -> str:
     """Turn the structured result into a WhatsApp-friendly text reply (not JSON)."""
     summary = result.get("summary", "").strip()
@@ -309,28 +400,26 @@ def format_minutes_for_whatsapp(result: dict) -> str:
     if summary:
         out.append("*Summary*\n" + summary)
     if participants:
-        p = ", ".join(participants) if isinstance(participants, list) else str(participants)
-        out.append(f"*Participants*: {p}")
+        out.append("*Participants*: " + (", ".join(participants) if isinstance(participants, list) else str(participants)))
     if bullets:
-        out.append("*Key Points / Action Items*")
-        for b in bullets:
-            out.append(f"• {b}")
+        # one C-level join instead of an f-string per bullet; same "\n\n" spacing as before
+        out.append("*Key Points / Action Items*\n\n• " + "\n\n• ".join(map(str, bullets)))
     return "\n\n".join(out).strip()
 
 def compute_audio_duration_seconds(file_path):
     """Compute audio duration safely using Mutagen."""
     try:
-        audio = MutagenFile(file_path)
-        if not audio or not getattr(audio.info, 'length', None):
-            return 0.0
-        return round(audio.info.length, 2)
+        length = read_audio_length(file_path)
+        return round(length, 2) if length else 0.0
     except Exception as e:
-        print("⚠️ Could not compute duration:", e)
+        logger.warning("Could not compute duration: %s", e)
         return 0.0
 
+_BULLET_RE = re.compile(r"^- ", re.MULTILINE)
+
 def format_summary_for_whatsapp(summary_text):
     """Make the summary WhatsApp-friendly (bold, emoji, bullet formatting)."""
-    formatted = re.sub(r"^- ", "• ", summary_text, flags=re.MULTILINE)
+    formatted = _BULLET_RE.sub("• ", summary_text)
     header = "📝 *Meeting Summary:*\n\n"
     return header + formatted.strip()
 
@@ -340,53 +429,112 @@ def normalize_phone_for_db(phone):
         return None
     return phone.strip().lower().replace(" ", "")
 
-def _get_pending_summary_job(phone):
-    """Check if user has a pending summary job awaiting language selection"""
+# Redis key TTL for webhook dedupe
+WEBHOOK_DEDUPE_TTL_SECONDS = 60 * 60
+
+def _claim_webhook_once(dedupe_key):
+    """
+    Atomically mark a webhook as seen in Redis (SET NX EX).
+    Returns True if this is the first delivery, False for a duplicate, None if Redis is unavailable.
+    """
+    if not redis_conn:
+        return None
     try:
-        with get_conn() as conn, conn.cursor() as cur:
-            # Try new column first, fallback to old method
-            try:
-                cur.execute("""
-                    SELECT id, detected_language FROM meeting_notes 
-                    WHERE phone=%s AND job_state='awaiting_language_choice'
-                    ORDER BY created_at DESC LIMIT 1
-                """, (phone,))
-                row = cur.fetchone()
-                if row:
-                    return {
-                        'meeting_id': row[0] if hasattr(row, '__getitem__') else row.id,
-                        'detected_language': row[1] if hasattr(row, '__getitem__') else row.detected_language
-                    }
-            except:
-                # Fallback to old JSON method if columns don't exist
-                cur.execute("""
-                    SELECT id, summary FROM meeting_notes 
-                    WHERE phone=%s AND transcript IS NOT NULL AND summary IS NOT NULL
-                    ORDER BY created_at DESC LIMIT 1
-                """, (phone,))
-                row = cur.fetchone()
-                if row:
-                    try:
-                        job_data = json.loads(row[1] if hasattr(row, '__getitem__') else row.summary)
-                        if job_data.get('status') == 'awaiting_language_selection':
-                            return {
-                                'meeting_id': row[0] if hasattr(row, '__getitem__') else row.id,
-                                'detected_language': job_data.get('detected_language', 'en')
-                            }
-                    except:
-                        pass
+        return bool(redis_conn.set(f"dedupe:{dedupe_key}", 1, nx=True, ex=WEBHOOK_DEDUPE_TTL_SECONDS))
     except Exception as e:
-        debug_print(f"Error checking pending jobs: {e}")
-    return None
+        logger.warning("Redis dedupe failed, falling back to DB: %s", e)
+        return None
+
+def _release_webhook_claim(dedupe_key):
+    """Undo _claim_webhook_once when handling failed, so Twilio's retry is processed, not dropped."""
+    try:
+        redis_conn.delete(f"dedupe:{dedupe_key}")
+    except Exception as e:
+        logger.warning("Redis dedupe release failed for %s: %s", dedupe_key, e)
+
+def _run_webhook_job(func, *args):
+    """
+    Run slow webhook work (downloads, OCR, geocoding) on the RQ worker so Twilio gets its 204 at once;
+    on a background thread if no queue is configured. func is a callable or a dotted "module.function" path.
+    """
+    if queue:
+        queue.enqueue(func, *args, job_timeout=60 * 10, result_ttl=60 * 60)
+        return
+    if isinstance(func, str):
+        module_name, func_name = func.rsplit(".", 1)
+        func = getattr(importlib.import_module(module_name), func_name)
+    threading.Thread(target=func, args=args, daemon=True).start()
+
+# ---- Numbered replies (1/2/3) ----
+NUMERIC_REPLIES = frozenset(("1", "2", "3"))
+
+def _clarify_choose_invoice(sender, meeting_id):
+    set_pending_state(meeting_id, None, phone=sender)
+    send_whatsapp_async(sender, "🧾 Invoice banana shuru kar rahe hain.\n\nLabour / service charge kitna hai?")
+
+def _clarify_choose_reminder(sender, meeting_id):
+    set_pending_state(meeting_id, None, phone=sender)
+    send_whatsapp_async(sender, "📋 Reminder set karne ke liye details bhejiye.")
+
+# CLARIFY_INTENT answers; any other number gets the "1 or 2" prompt
+CLARIFY_INTENT_HANDLERS = {
+    "1": _clarify_choose_invoice,
+    "2": _clarify_choose_reminder,
+}
+
+def _reply_summary_language(sender, pending_job, num_text):
+    """Queue the summary for a meeting awaiting its language choice."""
+    lang_choice = parse_language_choice(num_text)
+    if not lang_choice:
+        send_whatsapp_async(sender, "❌ Invalid choice. Reply 1, 2 or 3.")
+        return
+    if not queue:
+        send_whatsapp_async(sender, "⚠️ Service temporarily unavailable.")
+        return
+    queue.enqueue(
+        "worker_multilang_production_fixed_clean.complete_summary_job",
+        pending_job["meeting_id"],
+        lang_choice,
+        job_timeout=3600
+    )
+    _pending_state_cache.pop(sender)
+    send_whatsapp_async(sender, f"🔄 Generating summary in {get_language_name(lang_choice)}...")
+
+def _handle_numbered_reply(sender, num_text):
+    # one (cached) lookup gives both the pending state and any language-choice job
+    meeting_id, pending_state, pending_job = get_reply_context_by_phone(sender)
+
+    if pending_state == "CLARIFY_INTENT":
+        handler = CLARIFY_INTENT_HANDLERS.get(num_text)
+        if handler:
+            handler(sender, meeting_id)
+        else:
+            send_whatsapp_async(sender, "Please reply with 1 or 2.")
+        return
+
+    if pending_job:
+        _reply_summary_language(sender, pending_job, num_text)
+        return
+
+    # Fallback numeric handler
+    try:
+        if handle_numbered_response and handle_numbered_response(sender, num_text):
+            return
+    except Exception as e:
+        logger.exception("handle_numbered_response error: %s", e)
+
+    send_whatsapp_async(sender, "❌ No active options. Please try again.")
+
 
 @app.route("/twilio-webhook", methods=["POST"])
 def twilio_webhook():
     """Multi-language webhook handler with ALL original features"""
-    from datetime import datetime as dt
-    print(f"📞 WEBHOOK: Received request from {request.remote_addr} at {dt.utcnow()}")
-    print(f"📞 WEBHOOK: Headers: {dict(request.headers)}")
-    print(f"📞 WEBHOOK: Form data: {dict(request.form)}")
+    # lazy %-args: nothing is formatted unless LOG_LEVEL=DEBUG (the formatter adds the timestamp)
+    logger.debug("WEBHOOK: Received request from %s", request.remote_addr)
+    logger.debug("WEBHOOK: Headers: %s", request.headers)
+    logger.debug("WEBHOOK: Form data: %s", request.form)
     
+    dedupe_key = first_delivery = None
     try:
         sender_raw = request.values.get("From") or request.form.get("From")
         sender = normalize_phone_for_db(sender_raw)
@@ -394,15 +542,19 @@ def twilio_webhook():
         media_url = request.values.get("MediaUrl0") or request.form.get("MediaUrl0")
         media_hash = None
         if not message_sid and media_url:
-            media_hash = hashlib.sha256(media_url.encode("utf-8")).hexdigest()
+            media_hash = hashlib.blake2b(media_url.encode("utf-8"), digest_size=16).hexdigest()
         dedupe_key = message_sid or media_hash
 
-        # Check dedupe before doing heavy work
-        if dedupe_key:
+        # Check dedupe before doing heavy work: Redis SET NX first, DB only if Redis is down
+        first_delivery = _claim_webhook_once(dedupe_key) if dedupe_key else None
+        if first_delivery is False:
+            logger.info("Duplicate message detected (dedupe_key). Skipping processing.")
+            return ("", 204)
+        if dedupe_key and first_delivery is None:
             with get_conn() as conn, conn.cursor() as cur:
-                cur.execute("SELECT 1 FROM meeting_notes WHERE message_sid=%s LIMIT 1", (dedupe_key,))
+                execute_prepared(cur, "webhook_dedupe", (dedupe_key,))
                 if cur.fetchone():
-                    print("Duplicate message detected (dedupe_key). Skipping processing.")
+                    logger.info("Duplicate message detected (dedupe_key). Skipping processing.")
                     return ("", 204)
         
         # Handle text messages for language selection
@@ -412,9 +564,9 @@ def twilio_webhook():
         latitude = request.values.get("Latitude")
         longitude = request.values.get("Longitude")
         if latitude and longitude:
-            from whatsapp_features import handle_location_message
+            # feature-limit check, reverse geocode and task insert run after we've answered Twilio
             address = request.values.get("Address")
-            handle_location_message(sender, float(latitude), float(longitude), address)
+            _run_webhook_job("whatsapp_features.handle_location_message", sender, float(latitude), float(longitude), address)
             return ("", 204)
         
         media_type = request.values.get("MediaContentType0") or ""
@@ -422,8 +574,8 @@ def twilio_webhook():
 
         # Handle image messages
         if media_url and media_type.startswith("image/"):
-            from whatsapp_features import handle_image_message
-            handle_image_message(sender, media_url)
+            # image download + OCR run on the worker too
+            _run_webhook_job("whatsapp_features.handle_image_message", sender, media_url)
             return ("", 204)
 
         # Handle audio messages (WhatsApp voice notes)
@@ -431,40 +583,10 @@ def twilio_webhook():
             media_type.startswith("audio/")
             or media_type in ("video/ogg", "application/ogg")
         ):
-            try:
-                gcs_path = upload_twilio_media_to_gcs(
-                    media_url=media_url,
-                    content_type=media_type,
-                    phone=sender
-                )
-
-                debug_print(f"Audio uploaded to GCS: {gcs_path}")
-
-                # Pass GCS path to your existing flow
-                from db import create_transcription_job
-
-                job_id = create_transcription_job(
-                        phone=sender,
-                        gcs_path=gcs_path
-                    )
-
-                
-
-                send_whatsapp(
-                        sender,
-                        "🎤 Audio mil gaya. Likh ke bhej raha hoon…"
-                    )
-
-                return ("", 204)
-
-
-            except Exception as e:
-                debug_print("Audio handling failed:", e, traceback.format_exc())
-                send_whatsapp(
-                    sender,
-                    "❌ Audio process karne mein problem aayi. Please try again."
-                )
-                return ("", 204)
+            # Download + GCS upload + job insert run on the worker after we've answered Twilio
+            payload = {"sender": sender, "media_url": media_url, "media_type": media_type, "message_sid": message_sid}
+            _run_webhook_job(handle_incoming_media, payload)
+            return ("", 204)
 
 
 
@@ -472,57 +594,16 @@ def twilio_webhook():
         # -------------------------
         # Handle numbered responses (1,2,3) — unified & safe
         # -------------------------
-        if body_text in ("1", "2", "3"):
-            num_text = body_text
-            meeting_id, pending_state = get_pending_state_by_phone(sender)
-
-            # CLARIFY_INTENT gate
-            if pending_state == "CLARIFY_INTENT":
-                if num_text == "1":
-                    set_pending_state(meeting_id, None)
-                    send_whatsapp(sender, "🧾 Invoice banana shuru kar rahe hain.\n\nLabour / service charge kitna hai?")
-                    return ("", 204)
-                elif num_text == "2":
-                    set_pending_state(meeting_id, None)
-                    send_whatsapp(sender, "📋 Reminder set karne ke liye details bhejiye.")
-                    return ("", 204)
-                else:
-                    send_whatsapp(sender, "Please reply with 1 or 2.")
-                    return ("", 204)
-
-            # Pending summary language selection
-            pending_job = _get_pending_summary_job(sender)
-            if pending_job:
-                lang_choice = parse_language_choice(num_text)
-                if not lang_choice:
-                    send_whatsapp(sender, "❌ Invalid choice. Reply 1, 2 or 3.")
-                    return ("", 204)
-
-                if queue:
-                    queue.enqueue(
-                        "worker_multilang_production_fixed_clean.complete_summary_job",
-                        pending_job["meeting_id"],
-                        lang_choice,
-                        job_timeout=3600
-                    )
-                    send_whatsapp(sender, f"🔄 Generating summary in {get_language_name(lang_choice)}...")
-                else:
-                    send_whatsapp(sender, "⚠️ Service temporarily unavailable.")
-                return ("", 204)
-
-            # Fallback numeric handler
-            try:
-                from whatsapp_features import handle_numbered_response
-                if handle_numbered_response(sender, num_text):
-                    return ("", 204)
-            except Exception as e:
-                debug_print("handle_numbered_response error:", e, traceback.format_exc())
-
-            send_whatsapp(sender, "❌ No active options. Please try again.")
+        if body_text in NUMERIC_REPLIES:
+            _handle_numbered_reply(sender, body_text)
             return ("", 204)
 
     except Exception as e:
-            debug_print("twilio_webhook error:", e, traceback.format_exc())
+            logger.exception("twilio_webhook error: %s", e)
+            if first_delivery:
+                # handling / hand-off failed: free the key and answer 5xx so Twilio retries this delivery
+                _release_webhook_claim(dedupe_key)
+                return ("", 500)
             return ("", 204)
 
 
@@ -532,26 +613,30 @@ def twilio_webhook():
 @app.route("/razorpay-webhook", methods=["POST"])
 def razorpay_webhook():
     """Razorpay webhook endpoint (production-safe)"""
-    raw_bytes = request.get_data()
     signature_hdr = request.headers.get("X-Razorpay-Signature", "") or request.headers.get("x-razorpay-signature", "")
-
     debug_print("DEBUG — razorpay webhook received, signature header:", signature_hdr)
-    debug_print("DEBUG — raw body (first 300 bytes):", raw_bytes[:300])
 
+    # Body is hashed while it is read from the socket; the same buffer feeds the JSON parse
     try:
-        verified = verify_razorpay_webhook(raw_bytes, signature_hdr)
+        verified, raw_bytes = read_and_verify_razorpay_webhook(request.stream, signature_hdr)
+    except ValueError as e:
+        logger.warning("Razorpay webhook rejected: %s", e)
+        return ("Payload too large", 413)
     except Exception as e:
-        debug_print("verify_razorpay_webhook raised exception:", e, traceback.format_exc())
-        verified = False
+        logger.exception("verify_razorpay_webhook raised exception: %s", e)
+        verified, raw_bytes = False, b""
+
+    debug_print("DEBUG — raw body (first 300 bytes):", bytes(raw_bytes[:300]))
 
     if not verified:
-        debug_print("Razorpay webhook signature verification FAILED. Rejecting with 400.")
+        logger.warning("Razorpay webhook signature verification FAILED. Rejecting with 400.")
         return ("Signature verification failed", 400)
 
     try:
-        event_json = request.get_json(force=True)
+        # parse the exact bytes that were signature-checked (no second pass over the stream)
+        event_json = _json_loads(raw_bytes)
     except Exception as e:
-        debug_print("Invalid Razorpay webhook JSON:", e, traceback.format_exc())
+        logger.exception("Invalid Razorpay webhook JSON: %s", e)
         return ("Invalid JSON", 400)
 
     try:
@@ -564,89 +649,38 @@ def razorpay_webhook():
         if status == "ok":
             return ("OK", 200)
 
-        debug_print("Unhandled handler result (treat as error):", res)
+        logger.error("Unhandled handler result (treat as error): %s", res)
         return (str(res), 500)
     except Exception as e:
-        debug_print("Error handling Razorpay webhook:", e, traceback.format_exc())
+        logger.exception("Error handling Razorpay webhook: %s", e)
         return ("Internal error", 500)
 
 
-def upload_twilio_media_to_gcs(media_url, content_type, phone=None):
-    bucket_name = os.environ["GCS_BUCKET"]
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-
-    user_segment = phone.replace(":", "").replace("+", "") if phone else "anonymous"
-    timestamp = int(time.time())
-    ext = mimetypes.guess_extension(content_type) or ".ogg"
-
-    object_name = f"uploads/{user_segment}/{timestamp}{ext}"
-    blob = bucket.blob(object_name)
-
-    # Twilio media requires auth
-    auth = (
-        os.environ["TWILIO_ACCOUNT_SID"],
-        os.environ["TWILIO_AUTH_TOKEN"]
-    )
-
-    r = requests.get(media_url, auth=auth, timeout=30)
-    r.raise_for_status()
-
-    # ✅ Upload bytes, not stream
-    blob.upload_from_string(
-        r.content,
-        content_type=content_type
-    )
-
-    return f"gs://{bucket_name}/{object_name}"
-
-
 @app.route("/admin/user/<path:phone>", methods=["GET"])
 def admin_get_user(phone):
     """Admin endpoint to view user state"""
     try:
-        with get_conn() as conn, conn.cursor() as cur:
+        # get_cursor() yields mapping rows, so they serialize as-is
+        with get_cursor() as cur:
             cur.execute("SELECT phone, credits_remaining, subscription_active, subscription_expiry, created_at FROM users WHERE phone=%s", (phone,))
             row = cur.fetchone()
-            if not row:
-                return jsonify({"error": "not found"}), 404
-
-            if hasattr(row, "get"):
-                user_obj = dict(row)
-            else:
-                user_obj = {
-                    "phone": row[0],
-                    "credits_remaining": row[1],
-                    "subscription_active": row[2],
-                    "subscription_expiry": row[3],
-                    "created_at": row[4]
-                }
-            return jsonify({"user": user_obj}), 200
+        if not row:
+            return jsonify({"error": "not found"}), 404
+        return jsonify({"user": dict(row)}), 200
     except Exception as e:
-        debug_print("admin_get_user error:", e, traceback.format_exc())
+        logger.exception("admin_get_user error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/admin/notes/<path:phone>", methods=["GET"])
 def admin_get_notes(phone):
     try:
-        with get_conn() as conn, conn.cursor() as cur:
+        with get_cursor() as cur:
             cur.execute("SELECT id, audio_file, summary, created_at FROM meeting_notes WHERE phone=%s ORDER BY id DESC LIMIT 50", (phone,))
             rows = cur.fetchall()
-            normalized = []
-            for r in rows or []:
-                if hasattr(r, "get"):
-                    normalized.append(dict(r))
-                else:
-                    normalized.append({
-                        "id": r[0],
-                        "audio_file": r[1],
-                        "summary": r[2],
-                        "created_at": r[3]
-                    })
-            return jsonify({"notes": normalized}), 200
+        return jsonify({"notes": [dict(r) for r in rows]}), 200
     except Exception as e:
-        debug_print("admin_get_notes error:", e, traceback.format_exc())
+        logger.exception("admin_get_notes error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -685,8 +719,7 @@ def debug_twilio():
         test_result = "unknown"
         if account_sid and auth_token:
             try:
-                import requests
-                resp = requests.get(
+                resp = HTTP_SESSION.get(
                     "https://api.twilio.com/2010-04-01/Accounts.json",
                     auth=(account_sid, auth_token),
                     timeout=10
@@ -781,8 +814,51 @@ def test_worker():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def redis_cached(key_fn, ttl=60, when=None):
+    """
+    Serve a JSON GET handler's 200 body from the meeting read cache.
+    key_fn(**view_args) -> cache key, or None to bypass; when(body_dict) -> False skips storing
+    (e.g. "not ready yet" answers). Apply below @safe_endpoint.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = key_fn(**kwargs)
+            if key:
+                cached = meeting_cache_get(key)
+                if cached is not None:
+                    return app.response_class(cached, mimetype="application/json")
+            resp = app.make_response(fn(*args, **kwargs))
+            if key and resp.status_code == 200 and resp.is_json:
+                body = resp.get_data(as_text=True)
+                if when is None or when(_json_loads(body)):
+                    meeting_cache_set(key, body, ttl)
+            return resp
+        return wrapper
+    return decorator
+
+def conditional_get(max_age):
+    """
+    ETag (hash of the body) + Cache-Control: private, max-age on a GET handler's 200 answers;
+    a matching If-None-Match gets an empty 304. max_age=0 means "revalidate every time".
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            resp = app.make_response(fn(*args, **kwargs))
+            if resp.status_code != 200:
+                return resp
+            resp.add_etag()
+            resp.cache_control.private = True
+            resp.cache_control.max_age = max_age
+            return resp.make_conditional(request)
+        return wrapper
+    return decorator
+
 # GET lightweight status for mobile polling
+STATUS_POLL_MAX_AGE = 2  # seconds a client may reuse a status response without asking
 @app.route("/api/meeting/<int:meeting_id>/status", methods=["GET"])
+@conditional_get(STATUS_POLL_MAX_AGE)
 def api_get_meeting_status(meeting_id):
     """
     Returns small payload for polling:
@@ -795,6 +871,11 @@ def api_get_meeting_status(meeting_id):
 
 
 # POST /api/uploads/signed-url
+def _upload_object_name(phone, safe_name):
+    """Object path for a direct upload: uploads/<phone or anonymous>/<timestamp>_<filename>"""
+    user_segment = (phone.replace(":", "").replace("+", "") if phone else "anonymous")
+    return f"uploads/{user_segment}/{int(time.time())}_{safe_name}"
+
 # Request JSON: { "filename": "meeting_01.m4a", "content_type": "audio/m4a", "phone": "+911234..." }
 # Response: { "upload_url": "...", "object_path": "gs://bucket/..." }
 @app.route("/api/uploads/signed-url", methods=["POST"])
@@ -804,9 +885,6 @@ def api_signed_url():
     Client must do an HTTP PUT with 'Content-Type' header to the returned upload_url.
     After successful upload (HTTP 200/201), client should call POST /api/upload with audio_url set to object_path.
     """
-    if not GCS_AVAILABLE:
-        return jsonify({"error": "GCS not configured"}), 503
-    
     # Validate request
     try:
         data = request.get_json(force=True)
@@ -827,42 +905,83 @@ def api_signed_url():
     if not BUCKET_NAME:
         return jsonify({"error": "GCS_BUCKET not configured"}), 500
 
-    # Build object path: uploads/<phone or unknown>/<timestamp>_<filename>
-    user_segment = (phone.replace(":", "").replace("+", "") if phone else "anonymous")
-    timestamp = int(time.time())
-    object_name = f"uploads/{user_segment}/{timestamp}_{safe_name}"
-    storage_client = storage.Client()
+    object_name = _upload_object_name(phone, safe_name)
 
     try:
-        bucket = storage_client.bucket(BUCKET_NAME)
-        blob = bucket.blob(object_name)
-
-        # Signed URL expiration (in seconds) — 20 minutes recommended
-        expiration = timedelta(minutes=20)
-
-        upload_url = blob.generate_signed_url(
-            version="v4",
-            expiration=expiration,
-            method="PUT",
-            content_type=content_type,
-        )
+        # Signed URL expiration — 20 minutes; signing reuses the process's cached credentials
+        upload_url, expires_at = sign_gcs_url(BUCKET_NAME, object_name, method="PUT", content_type=content_type)
 
         object_path = f"gs://{BUCKET_NAME}/{object_name}"
 
         return jsonify({
             "upload_url": upload_url,
             "object_path": object_path,
-            "expires_in_seconds": int(expiration.total_seconds())
+            "expires_in_seconds": max(0, expires_at - int(time.time()))
         }), 200
 
     except Exception as e:
         # Log error server-side; return safe message
-        print("api_signed_url error:", str(e))
+        logger.error("api_signed_url error: %s", e)
         return jsonify({"error": "failed_to_generate_signed_url", "detail": str(e)}), 500
 
 
+MAX_SIGNED_URL_BATCH = 100
+
+# Request JSON: { "phone": "+911234...", "objects": [{"filename": "a.m4a", "content_type": "audio/m4a"}, ...] }
+# Response: { "results": [{"filename", "upload_url", "object_path", "expires_in_seconds"}, ...] } (request order)
+@app.route("/api/uploads/signed-url/batch", methods=["POST"])
+def api_signed_url_batch():
+    """
+    Many signed PUT URLs in one round-trip: one credential load / refresh for the batch, and
+    concurrent signing. Same object naming as /api/uploads/signed-url.
+    """
+    try:
+        data = request.get_json(force=True)
+    except Exception:
+        return jsonify({"error": "invalid_json"}), 400
+
+    objects = data.get("objects") if isinstance(data, dict) else None
+    if not isinstance(objects, list) or not objects:
+        return jsonify({"error": "objects required"}), 400
+    if len(objects) > MAX_SIGNED_URL_BATCH:
+        return jsonify({"error": f"at most {MAX_SIGNED_URL_BATCH} objects per request"}), 400
+
+    BUCKET_NAME = os.environ.get("GCS_BUCKET")
+    if not BUCKET_NAME:
+        return jsonify({"error": "GCS_BUCKET not configured"}), 500
+
+    phone = data.get("phone")
+    items = []
+    for i, obj in enumerate(objects):
+        filename = (obj.get("filename") or obj.get("name")) if isinstance(obj, dict) else None
+        if not filename:
+            return jsonify({"error": f"objects[{i}].filename required"}), 400
+        items.append((filename, _upload_object_name(phone, secure_filename(filename)),
+                      obj.get("content_type", "application/octet-stream")))
+
+    try:
+        signed = sign_gcs_urls(BUCKET_NAME, [(name, ct) for _, name, ct in items], method="PUT")
+    except Exception as e:
+        logger.error("api_signed_url_batch error: %s", e)
+        return jsonify({"error": "failed_to_generate_signed_url", "detail": str(e)}), 500
+
+    now = int(time.time())
+    return jsonify({"results": [
+        {
+            "filename": filename,
+            "upload_url": upload_url,
+            "object_path": f"gs://{BUCKET_NAME}/{object_name}",
+            "expires_in_seconds": max(0, expires_at - now)
+        }
+        for (filename, object_name, _), (upload_url, expires_at) in zip(items, signed)
+    ]}), 200
+
+
 # GET full meeting detail for job-detail screen
 @app.route("/api/meeting/<int:meeting_id>/detail", methods=["GET"])
+@conditional_get(10)
+@redis_cached(lambda meeting_id: meeting_cache_key("detail", meeting_id), ttl=30,
+              when=lambda body: body.get("transcript") is not None)  # not while still transcribing
 def api_get_meeting_detail(meeting_id):
     """
     Returns meeting object with transcript and summary (if available).
@@ -898,6 +1017,41 @@ def test_whatsapp():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Header prefix handed to PyAV / ffprobe by /test-audio-format
+FFPROBE_HEAD_BYTES = 256 * 1024
+
+def _probe_with_pyav(head):
+    """
+    Read container metadata in-process with PyAV (libav bindings), skipping the ffprobe spawn.
+    Returns an ffprobe-like dict, or None if PyAV isn't installed or can't parse the prefix.
+    """
+    try:
+        import av
+    except ImportError:
+        return None
+    try:
+        with av.open(BytesIO(head)) as container:
+            return {
+                "format": {
+                    "format_name": container.format.name,
+                    "duration": container.duration / av.time_base if container.duration else None,
+                    "bit_rate": container.bit_rate or None,
+                },
+                "streams": [
+                    {
+                        "codec_type": s.type,
+                        "codec_name": s.codec_context.name if s.codec_context else None,
+                        "sample_rate": getattr(s, "rate", None),
+                        "channels": getattr(s.codec_context, "channels", None) if s.codec_context else None,
+                    }
+                    for s in container.streams
+                ],
+                "probe": "pyav",
+            }
+    except Exception as e:
+        logger.debug("PyAV probe failed, falling back to ffprobe: %s", e)
+        return None
+
 @app.route("/test-audio-format", methods=["POST"])
 def test_audio_format():
     """Test endpoint to check audio format compatibility"""
@@ -907,36 +1061,42 @@ def test_audio_format():
         if not media_url:
             return jsonify({"error": "media_url required"}), 400
         
-        # Download and analyze the audio file
-        import tempfile
-        resp = requests.get(media_url, timeout=30)
-        resp.raise_for_status()
-        
-        content_type = resp.headers.get('Content-Type', '')
-        first_bytes = resp.content[:16].hex() if len(resp.content) >= 16 else 'empty'
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.tmp') as tmp:
-            tmp.write(resp.content)
-            tmp_path = tmp.name
-        
-        try:
-            # Try to get format info using ffmpeg
-            import subprocess
-            result = subprocess.run([
-                'ffmpeg', '-i', tmp_path, '-f', 'null', '-'
-            ], capture_output=True, text=True, timeout=10)
-            
-            format_info = result.stderr  # ffmpeg outputs format info to stderr
-        except Exception as e:
-            format_info = f"ffmpeg error: {e}"
-        
-        os.remove(tmp_path)
-        
+        # Only the container header is needed: read a bounded prefix, never the whole file
+        with HTTP_SESSION.get(media_url, stream=True, timeout=30) as resp:
+            resp.raise_for_status()
+            content_type = resp.headers.get('Content-Type', '')
+            content_length = resp.headers.get('Content-Length')
+            head = bytearray()
+            for chunk in resp.iter_content(chunk_size=64 * 1024):
+                head += chunk
+                if len(head) >= FFPROBE_HEAD_BYTES:
+                    break
+
+        first_bytes = bytes(head[:16]).hex() if len(head) >= 16 else 'empty'
+
+        format_info = _probe_with_pyav(bytes(head))
+        if format_info is None:
+            try:
+                # ffprobe reads headers only (no decode) and reports structured JSON
+                import subprocess
+                result = subprocess.run([
+                    'ffprobe', '-v', 'error', '-print_format', 'json',
+                    '-show_format', '-show_streams', 'pipe:0'
+                ], input=bytes(head), capture_output=True, timeout=5)
+
+                if result.returncode == 0:
+                    format_info = _json_loads(result.stdout or b"{}")
+                else:
+                    format_info = {"error": result.stderr.decode("utf-8", "replace")[:500]}
+            except Exception as e:
+                format_info = {"error": f"ffprobe error: {e}"}
+
         return jsonify({
             "content_type": content_type,
-            "file_size": len(resp.content),
+            "file_size": int(content_length) if content_length and content_length.isdigit() else None,
+            "probed_bytes": len(head),
             "first_bytes": first_bytes,
-            "ffmpeg_info": format_info[:500]  # Truncate for readability
+            "ffprobe_info": format_info
         }), 200
         
     except Exception as e:
@@ -982,12 +1142,92 @@ def test_image_ocr():
 # Minimal REST API layer
 # -----------------------
 
-ALLOWED_EXTENSIONS = {"m4a","mp3","wav","ogg","opus","webm","aac","3gp"}
+def safe_endpoint(fn):
+    """
+    Shared error envelope for API handlers: HTTP errors raised by Werkzeug (e.g. 413 from
+    MAX_CONTENT_LENGTH) keep their status; anything else is logged once with its traceback
+    and returned as a generic 500.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except HTTPException as e:
+            return jsonify({"error": e.description}), e.code
+        except Exception:
+            logger.exception("%s error", fn.__name__)
+            return jsonify({"error": "internal_error"}), 500
+    return wrapper
+
+ALLOWED_EXTENSIONS = frozenset({"m4a","mp3","wav","ogg","opus","webm","aac","3gp"})
+# Containers that carry audio but are reported as video/* by some clients
+ALLOWED_VIDEO_MIMETYPES = frozenset({"video/mp4", "video/webm", "video/ogg", "video/3gpp"})
 
 def _allowed_file(filename):
-    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+    _, dot, ext = filename.rpartition(".")
+    return bool(dot) and ext.lower() in ALLOWED_EXTENSIONS
+
+def _allowed_mimetype(mimetype):
+    """Accept audio/*, audio-bearing video containers, and untyped uploads (extension already checked)."""
+    if not mimetype or mimetype == "application/octet-stream":
+        return True
+    return mimetype.startswith("audio/") or mimetype in ALLOWED_VIDEO_MIMETYPES
+
+UPLOAD_CHUNK_BYTES = 1 << 20
+
+try:
+    from streaming_form_data import StreamingFormDataParser
+    from streaming_form_data.targets import FileTarget, ValueTarget
+except ImportError:  # optional: Werkzeug's form parser is used instead
+    StreamingFormDataParser = None
+
+def _receive_upload_streaming(dest_path):
+    """
+    Parse the multipart body with streaming-form-data's C parser, writing the "file" part
+    straight to dest_path (no Werkzeug spool file + second copy).
+    Returns (phone, title, client_filename, mimetype); client_filename is None without a file part.
+    """
+    parser = StreamingFormDataParser(headers=request.headers)
+    phone_t, title_t, file_t = ValueTarget(), ValueTarget(), FileTarget(dest_path)
+    parser.register("phone", phone_t)
+    parser.register("title", title_t)
+    parser.register("file", file_t)
+    try:
+        while True:
+            chunk = request.stream.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            parser.data_received(chunk)
+    except Exception:
+        with suppress(FileNotFoundError):
+            os.unlink(dest_path)
+        raise
+    phone = phone_t.value.decode("utf-8", "replace").strip() or None
+    return phone, title_t.value.decode("utf-8", "replace"), file_t.multipart_filename, file_t.multipart_content_type
+
+def _stream_upload_to_path(upload, path):
+    """Copy an uploaded FileStorage to `path` in 1 MB chunks; removes the partial file on failure."""
+    try:
+        with open(path, "wb", buffering=UPLOAD_CHUNK_BYTES) as out:
+            while True:
+                chunk = upload.stream.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                out.write(chunk)
+    except Exception:
+        with suppress(FileNotFoundError):
+            os.unlink(path)
+        raise
+
+# API_UPLOAD_TO_GCS=1: /api/upload streams the file to GCS and hands the worker a gs:// path
+# (no TEMP_DIR copy, no shared disk needed between web and worker)
+API_UPLOAD_TO_GCS = os.getenv("API_UPLOAD_TO_GCS", "0") == "1"
+# API_UPLOAD_MULTIPART=0 retires the file-body path: clients PUT to /api/uploads/signed-url's
+# URL and then POST /api/meeting/create, so no web worker is held for the transfer
+API_UPLOAD_MULTIPART = os.getenv("API_UPLOAD_MULTIPART", "1") != "0"
 
 @app.route("/api/upload", methods=["POST"])
+@safe_endpoint
 def api_upload():
     """
     Multipart form:
@@ -996,250 +1236,343 @@ def api_upload():
       - title (optional)
     Response: { meeting_id, status }
     """
-    try:
-        phone = request.form.get("phone")
-        title = request.form.get("title") or ""
-        if not phone:
-            return jsonify({"error": "phone required"}), 400
-        if "file" not in request.files:
-            return jsonify({"error": "file required"}), 400
-
-        f = request.files["file"]
-        filename = secure_filename(f.filename or f"{int(time.time())}.m4a")
-        if not _allowed_file(filename):
-            return jsonify({"error": "unsupported file type"}), 400
+    if not API_UPLOAD_MULTIPART:
+        return jsonify({"error": "multipart upload disabled",
+                        "detail": "PUT the file to POST /api/uploads/signed-url's upload_url, then POST /api/meeting/create"}), 410
+
+    # Reject oversized bodies before the form is parsed
+    if request.content_length and request.content_length > MAX_UPLOAD_BYTES:
+        return jsonify({"error": "file too large"}), 413
+
+    if StreamingFormDataParser and not API_UPLOAD_TO_GCS:
+        return _api_upload_streaming()
+
+    phone = request.form.get("phone")
+    title = request.form.get("title") or ""
+    if not phone:
+        return jsonify({"error": "phone required"}), 400
+    if "file" not in request.files:
+        return jsonify({"error": "file required"}), 400
+
+    f = request.files["file"]
+    filename = secure_filename(f.filename or f"{int(time.time())}.m4a")
+    if not _allowed_file(filename) or not _allowed_mimetype(f.mimetype):
+        return jsonify({"error": "unsupported file type"}), 400
+
+    if API_UPLOAD_TO_GCS:
+        user_segment = phone.replace(":", "").replace("+", "")
+        object_name = f"uploads/{user_segment}/{int(time.time())}_{filename}"
+        audio_path = upload_stream_to_gcs(f.stream, object_name, f.mimetype or "application/octet-stream")
+    else:
+        # TEMP_DIR may be a small tmpfs: refuse up front rather than fail mid-write
+        if request.content_length and request.content_length > temp_dir_free_bytes():
+            return jsonify({"error": "insufficient temp space for upload"}), 413
 
         # Save to TEMP_DIR then pass to worker (we used TEMP_DIR earlier)
-        tmp_path = os.path.join(TEMP_DIR, f"app_upload_{int(time.time())}_{filename}")
-        f.save(tmp_path)
-
-        # Create meeting row in DB (use save_meeting_notes_with_sid to reuse schema)
-        # store audio_file as local path (or better: upload to S3 and store URL)
-        saved = save_meeting_notes_with_sid(phone, tmp_path, None, None, message_sid=None)
-        meeting_id = saved.get("id") if isinstance(saved, dict) else (saved[0] if saved else None)
-
-        # enqueue existing worker to process audio job (same worker name you use in app.py)
-        if queue:
-            queue.enqueue(
-                "worker_multilang_production_fixed_clean.process_audio_job",
-                meeting_id,
-                tmp_path,
-                job_timeout=60 * 60,
-                result_ttl=60 * 60
-            )
-            return jsonify({"meeting_id": meeting_id, "status": "processing"}), 200
-        else:
-            return jsonify({"meeting_id": meeting_id, "status": "queued_failed", "note": "queue not initialized"}), 503
+        audio_path = os.path.join(TEMP_DIR, f"app_upload_{int(time.time())}_{filename}")
+        _stream_upload_to_path(f, audio_path)
 
-    except Exception as e:
-        debug_print("api_upload error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+    return _start_upload_processing(phone, audio_path)
+
+def _api_upload_streaming():
+    """api_upload for local storage when streaming-form-data is installed: one pass, one disk write."""
+    if request.content_length and request.content_length > temp_dir_free_bytes():
+        return jsonify({"error": "insufficient temp space for upload"}), 413
+
+    ts = int(time.time())
+    staging_path = os.path.join(TEMP_DIR, f"app_upload_{ts}_{uuid.uuid4().hex}.part")
+    phone, title, client_filename, mimetype = _receive_upload_streaming(staging_path)
+
+    error = None
+    if not phone:
+        error = "phone required"
+    elif client_filename is None:
+        error = "file required"
+    else:
+        filename = secure_filename(client_filename or f"{ts}.m4a")
+        if not _allowed_file(filename) or not _allowed_mimetype(mimetype):
+            error = "unsupported file type"
+    if error:
+        with suppress(FileNotFoundError):
+            os.unlink(staging_path)
+        return jsonify({"error": error}), 400
+
+    audio_path = os.path.join(TEMP_DIR, f"app_upload_{ts}_{filename}")
+    os.replace(staging_path, audio_path)
+    return _start_upload_processing(phone, audio_path)
+
+@app.route("/api/meeting/create", methods=["POST"])
+@safe_endpoint
+def api_create_meeting():
+    """
+    POST JSON: { "phone": "whatsapp:+91...", "title": "...", "object_path": "gs://<bucket>/uploads/..." }
+    For files already PUT to GCS via /api/uploads/signed-url: creates the meeting row and
+    enqueues processing. Response: { meeting_id, status }
+    """
+    data = request.get_json(force=True) if request.is_json else {}
+    phone = data.get("phone")
+    object_path = data.get("object_path") or ""
+    if not phone:
+        return jsonify({"error": "phone required"}), 400
+
+    bucket_name = os.environ.get("GCS_BUCKET")
+    prefix = f"gs://{bucket_name}/uploads/"
+    if not bucket_name or not object_path.startswith(prefix):
+        return jsonify({"error": "object_path must be a gs:// path returned by /api/uploads/signed-url"}), 400
+    object_name = object_path[len(f"gs://{bucket_name}/"):]
+    if not _allowed_file(object_name):
+        return jsonify({"error": "unsupported file type"}), 400
+    # one metadata GET: don't create a meeting for an upload that never finished
+    if not get_gcs_client().bucket(bucket_name).blob(object_name).exists():
+        return jsonify({"error": "object not found; upload it first"}), 404
+
+    return _start_upload_processing(phone, object_path)
+
+
+def _start_upload_processing(phone, audio_path):
+    # Create meeting row in DB (use save_meeting_notes_with_sid to reuse schema)
+    # audio_file is the local TEMP_DIR path or the gs:// URI
+    saved = save_meeting_notes_with_sid(phone, audio_path, None, None, message_sid=None)
+    invalidate_meeting_cache(phone=phone)
+    meeting_id = saved.get("id") if isinstance(saved, dict) else (saved[0] if saved else None)
+
+    # enqueue existing worker to process audio job (same worker name you use in app.py)
+    if queue:
+        queue.enqueue(
+            "worker_multilang_production_fixed_clean.process_audio_job",
+            meeting_id,
+            audio_path,
+            job_timeout=60 * 60,
+            result_ttl=60 * 60
+        )
+        return jsonify({"meeting_id": meeting_id, "status": "processing"}), 200
+    else:
+        return jsonify({"meeting_id": meeting_id, "status": "queued_failed", "note": "queue not initialized"}), 503
 
 
 
 @app.route("/api/meeting/<int:meeting_id>/transcript", methods=["GET"])
+@safe_endpoint
+@conditional_get(30)
+@redis_cached(lambda meeting_id: meeting_cache_key("transcript", meeting_id), ttl=300,
+              when=lambda body: body.get("status") == "ok")  # immutable once written
 def api_get_transcript(meeting_id):
     """Return decrypted transcript if present"""
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT transcript FROM meeting_notes WHERE id=%s", (meeting_id,))
+        row = cur.fetchone()
+        if not row:
+            return jsonify({"error": "not found"}), 404
+        transcript_enc = row[0]
+        if not transcript_enc:
+            return jsonify({"transcript": None, "status": "not_ready"}), 200
+        transcript = decrypt_sensitive_data(transcript_enc)
+        return jsonify({"transcript": transcript, "status": "ok"}), 200
+
+
+# Off-request-path persistence (encrypt + UPDATE) for results we can already answer with
+_PERSIST_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="persist")
+atexit.register(_PERSIST_POOL.shutdown)
+
+def _persist_summary(meeting_id, summary_text, language):
     try:
-        with get_conn() as conn, conn.cursor() as cur:
-            cur.execute("SELECT transcript FROM meeting_notes WHERE id=%s", (meeting_id,))
-            row = cur.fetchone()
-            if not row:
-                return jsonify({"error": "not found"}), 404
-            # handle both mapping-like and tuple-like rows
-            transcript_enc = row[0] if not hasattr(row, "get") else row.get("transcript")
-            if not transcript_enc:
-                return jsonify({"transcript": None, "status": "not_ready"}), 200
-            transcript = decrypt_sensitive_data(transcript_enc)
-            return jsonify({"transcript": transcript, "status": "ok"}), 200
+        save_meeting_summary(meeting_id, summary_text, language)
     except Exception as e:
-        debug_print("api_get_transcript error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+        logger.exception("_persist_summary error for meeting %s: %s", meeting_id, e)
+
+
+# Transient LLM/DB failures are retried by RQ instead of surfacing to the client;
+# the jobs cancel their own retries on permanent errors (meeting_jobs.retry_transient_only)
+MEETING_JOB_RETRY_INTERVALS = [10, 30]
+
+def _enqueue_meeting_job(job_func, *args):
+    """Run an LLM meeting job on the RQ queue (202 + job_id); run it inline if the queue is down."""
+    if queue:
+        from rq import Retry as RQRetry
+        job = queue.enqueue(job_func, *args, job_timeout=60 * 10, result_ttl=60 * 60,
+                            retry=RQRetry(max=len(MEETING_JOB_RETRY_INTERVALS), interval=MEETING_JOB_RETRY_INTERVALS))
+        return jsonify({"job_id": job.id, "status": "queued"}), 202
+    result = job_func(*args)
+    return jsonify(result), (500 if "error" in result else 200)
 
 
 @app.route("/api/meeting/<int:meeting_id>/summarize", methods=["POST"])
+@safe_endpoint
 def api_summarize(meeting_id):
     """
     POST JSON body: { "language": "hi" }
-    Returns: {"summary": "..."}
+    Returns: {"summary": "..."} on cache hit, else 202 {"job_id": "...", "status": "queued"}
     """
-    try:
-        data = request.get_json(force=True) if request.is_json else {}
-        language = data.get("language") or LANGUAGE or "hi"
-
-        # Fetch transcript
-        with get_conn() as conn, conn.cursor() as cur:
-            cur.execute("SELECT transcript FROM meeting_notes WHERE id=%s", (meeting_id,))
-            row = cur.fetchone()
-            if not row:
-                return jsonify({"error": "meeting not found"}), 404
-            enc_transcript = row[0] if not hasattr(row, "get") else row.get("transcript")
-            if not enc_transcript:
-                return jsonify({"error": "transcript not available yet"}), 400
-            transcript = decrypt_sensitive_data(enc_transcript)
-
-        # Call your summarizer (this blocks; you may want to enqueue a worker instead)
-        summary_text = summarize_text_multilang(transcript, language_code=language, instructions="Provide a concise meeting summary with bullets, decisions and action items.")
-        # Encrypt and save summary to DB
-        enc_summary = encrypt_sensitive_data(summary_text)
-        with get_conn() as conn, conn.cursor() as cur:
-            cur.execute("UPDATE meeting_notes SET summary=%s, chosen_language=%s, summary_generated_at=now(), job_state='completed' WHERE id=%s",
-                        (enc_summary, language, meeting_id))
-            conn.commit()
+    data = request.get_json(force=True) if request.is_json else {}
+    language = data.get("language") or LANGUAGE or "hi"
 
+    # Fetch transcript, plus any stored summary, in the one checkout this request makes
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT transcript, summary, chosen_language FROM meeting_notes WHERE id=%s", (meeting_id,))
+        row = cur.fetchone()
+    if not row:
+        return jsonify({"error": "meeting not found"}), 404
+    enc_transcript, enc_summary, chosen_language = row[0], row[1], row[2]
+    if not enc_transcript:
+        return jsonify({"error": "transcript not available yet"}), 400
+
+    # Already summarized in this language: nothing to generate or save
+    if enc_summary and chosen_language == language:
+        return jsonify({"summary": decrypt_sensitive_data(enc_summary), "language": language}), 200
+    transcript = decrypt_sensitive_data(enc_transcript)
+
+    # Same transcript + language was summarized before: answer without the queue
+    summary_text = llm_cache_get(llm_cache_key("sum", transcript, language, SUMMARY_INSTRUCTIONS))
+    if summary_text is not None:
+        # Client already gets the plaintext; encrypt + UPDATE after responding
+        _PERSIST_POOL.submit(_persist_summary, meeting_id, summary_text, language)
         return jsonify({"summary": summary_text, "language": language}), 200
 
-    except Exception as e:
-        debug_print("api_summarize error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+    # LLM call + save run on the worker; poll GET /api/job/<job_id>
+    return _enqueue_meeting_job(summarize_meeting_job, meeting_id, language)
 
 
 @app.route("/api/meeting/<int:meeting_id>/translate", methods=["POST"])
+@safe_endpoint
 def api_translate(meeting_id):
     """
     Translate summary/transcript to requested language.
     POST JSON: { "to": "en" }
+    Returns: {"translation": "..."} on cache hit, else 202 {"job_id": "...", "status": "queued"}
     """
-    try:
-        data = request.get_json(force=True) if request.is_json else {}
-        to_lang = data.get("to") or "en"
+    data = request.get_json(force=True) if request.is_json else {}
+    to_lang = data.get("to") or "en"
 
-        # get summary (prefer), else transcript
-        with get_conn() as conn, conn.cursor() as cur:
-            cur.execute("SELECT summary, transcript FROM meeting_notes WHERE id=%s", (meeting_id,))
-            row = cur.fetchone()
-            if not row:
-                return jsonify({"error": "not found"}), 404
-            summary_enc = row[0] if not hasattr(row, "get") else row.get("summary")
-            transcript_enc = row[1] if not hasattr(row, "get") else row.get("transcript")
-
-            source_text = None
-            if summary_enc:
-                source_text = decrypt_sensitive_data(summary_enc)
-            elif transcript_enc:
-                source_text = decrypt_sensitive_data(transcript_enc)
-            else:
-                return jsonify({"error": "no text available to translate"}), 400
-
-        # Use summarizer with translation instructions (safe re-use)
-        translation_prompt = f"Translate the following content to {to_lang} language only. Preserve names, dates and numbers.\n\n{source_text}"
-        translated = summarize_text_multilang(source_text, language_code=to_lang, instructions="Translate the text, do not add extra commentary.", max_tokens=800)
+    # get summary (prefer), else transcript - same single read the job uses
+    try:
+        source_text, source_lang = fetch_translation_source(meeting_id)
+    except LookupError:
+        return jsonify({"error": "not found"}), 404
+    if not source_text:
+        return jsonify({"error": "no text available to translate"}), 400
+
+    # Summary is already in the requested language: nothing to translate
+    if source_lang == to_lang:
+        return jsonify({"translation": source_text, "to": to_lang}), 200
+
+    translated = llm_cache_get(llm_cache_key("tr", source_text, to_lang, TRANSLATE_INSTRUCTIONS))
+    if translated is not None:
         return jsonify({"translation": translated, "to": to_lang}), 200
 
-    except Exception as e:
-        debug_print("api_translate error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+    return _enqueue_meeting_job(translate_meeting_job, meeting_id, to_lang)
 
 
 @app.route("/api/meeting/<int:meeting_id>/actions", methods=["POST"])
+@safe_endpoint
 def api_extract_actions(meeting_id):
     """
     Extract action items from transcript and create tasks.
-    Returns: { "created_tasks": [ ... ] }
+    Returns: 202 {"job_id": "...", "status": "queued"}; job result is { "created_tasks": [ ... ] }
     """
-    try:
-        # Fetch transcript
-        with get_conn() as conn, conn.cursor() as cur:
-            cur.execute("SELECT transcript, phone FROM meeting_notes JOIN users ON users.phone = meeting_notes.phone WHERE meeting_notes.id=%s", (meeting_id,))
-            row = cur.fetchone()
-            if not row:
-                return jsonify({"error": "meeting not found"}), 404
-            # handle mapping-like
-            if hasattr(row, "get"):
-                transcript_enc = row.get("transcript")
-                phone = row.get("phone")
-            else:
-                transcript_enc = row[0]
-                phone = row[1]
-
-            if not transcript_enc:
-                return jsonify({"error": "transcript not available"}), 400
-            transcript = decrypt_sensitive_data(transcript_enc)
+    # Cheap existence check so bad ids still get 404/400 instead of a failed job
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT transcript IS NOT NULL FROM meeting_notes JOIN users ON users.phone = meeting_notes.phone WHERE meeting_notes.id=%s", (meeting_id,))
+        row = cur.fetchone()
+        if not row:
+            return jsonify({"error": "meeting not found"}), 404
+        if not row[0]:
+            return jsonify({"error": "transcript not available"}), 400
 
-        # Ask LLM to extract action items as JSON
-        instruction = (
-            "Extract action items from the meeting transcript and return a JSON array of objects with keys: "
-            "'text' (action text), 'owner' (person or null), 'due' (YYYY-MM-DD or null). "
-            "Return strictly valid JSON only."
-        )
-        ai_resp = summarize_text_multilang(transcript, language_code="en", instructions=instruction, max_tokens=700, temperature=0.0)
-        # Try to parse JSON from ai_resp
-        try:
-            # The model sometimes returns text before/after JSON — try to extract first JSON array
-            s = ai_resp.strip()
-            start = s.find('[')
-            end = s.rfind(']') + 1
-            json_text = s[start:end] if start != -1 and end != -1 else s
-            items = json.loads(json_text)
-        except Exception:
-            # fallback: return raw AI response
-            return jsonify({"error": "failed to parse action items", "raw": ai_resp}), 500
+    # LLM extraction + task inserts run on the worker; poll GET /api/job/<job_id>
+    return _enqueue_meeting_job(extract_actions_job, meeting_id)
 
-        created = []
-        # Create tasks using existing create_task helper (this associates with user via phone)
-        for it in items:
-            text = it.get("text") or it.get("action") or str(it)
-            owner = it.get("owner")
-            due = it.get("due")  # keep ISO date or None
-            # create_task(phone_or_user_id, title, description=None, due_at=None, priority=3, source='whatsapp', metadata=None, recurring_rule=None)
-            task = create_task(phone, text, description=None, due_at=due, priority=3, source='mina_ai', metadata={"meeting_id": meeting_id})
-            created.append(task)
 
-        return jsonify({"created_tasks": created}), 200
+@app.route("/api/job/<job_id>", methods=["GET"])
+@safe_endpoint
+def api_get_job(job_id):
+    """
+    Poll a queued meeting or reminder fan-out job.
+    Returns: {"job_id", "status": queued|started|finished|failed|..., "result"?, "error"?}
+    """
+    if not queue:
+        return jsonify({"error": "queue not available"}), 503
+    from rq.job import Job
+    from rq.exceptions import NoSuchJobError
+    try:
+        job = Job.fetch(job_id, connection=queue.connection, serializer=queue.serializer)
+    except NoSuchJobError:
+        return jsonify({"error": "not found"}), 404
 
-    except Exception as e:
-        debug_print("api_extract_actions error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+    status = job.get_status()
+    body = {"job_id": job.id, "status": getattr(status, "value", status)}
+    if body["status"] == "finished":
+        body["result"] = job.result
+    elif body["status"] == "failed":
+        # last line of the worker traceback, e.g. "ValueError: transcript not available yet"
+        tb_lines = (job.exc_info or "").strip().splitlines()
+        body["error"] = tb_lines[-1] if tb_lines else "job failed"
+    return jsonify(body), 200
 
 
 @app.route("/api/action/<int:action_id>/reminder", methods=["POST"])
+@safe_endpoint
 def api_create_reminder(action_id):
     """
     POST JSON: { "remind_at": "2025-11-20T09:00:00+05:30" } (ISO8601)
     Creates a reminder row tied to an action_item.
     """
+    data = request.get_json(force=True) if request.is_json else {}
+    remind_at = data.get("remind_at")
+    if not remind_at:
+        return jsonify({"error": "remind_at required"}), 400
+    with get_conn() as conn, conn.cursor() as cur:
+        execute_prepared(cur, "reminder_insert", (remind_at, action_id))
+        row = cur.fetchone()
+        conn.commit()
+    if not row:
+        return jsonify({"error": "action not found"}), 404
+    return jsonify({"reminder_id": row[0], "status": "scheduled"}), 200
+
+
+MAX_BULK_REMINDERS = 500
+
+@app.route("/api/reminders/bulk", methods=["POST"])
+@safe_endpoint
+def api_create_reminders_bulk():
+    """
+    POST JSON: { "reminders": [ {"action_id": 12, "remind_at": "2025-11-20T09:00:00+05:30"}, ... ] }
+    Creates all reminders in one INSERT. Returns {"created": [{"id", "task_id"}], "count": N}
+    """
+    data = request.get_json(force=True) if request.is_json else {}
+    items = data.get("reminders") or []
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "reminders list required"}), 400
+    if len(items) > MAX_BULK_REMINDERS:
+        return jsonify({"error": f"at most {MAX_BULK_REMINDERS} reminders per request"}), 400
     try:
-        data = request.get_json(force=True) if request.is_json else {}
-        remind_at = data.get("remind_at")
-        if not remind_at:
-            return jsonify({"error": "remind_at required"}), 400
-        with get_conn() as conn, conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO reminders (task_id, remind_at, sent, created_at)
-                VALUES (%s, %s, false, now()) RETURNING id
-            """, (action_id, remind_at))
-            row = cur.fetchone()
-            conn.commit()
-            reminder_id = row[0] if row else None
-        return jsonify({"reminder_id": reminder_id, "status": "scheduled"}), 200
-    except Exception as e:
-        debug_print("api_create_reminder error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+        rows = [(int(it["action_id"]), it["remind_at"]) for it in items]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "each reminder needs action_id and remind_at"}), 400
+    created = create_reminders_bulk(rows)
+    return jsonify({"created": created, "count": len(created)}), 200
 
 
 @app.route("/api/history", methods=["GET"])
+@safe_endpoint
+@conditional_get(30)
+@redis_cached(lambda: meeting_cache_key("history", request.args["phone"]) if request.args.get("phone") else None, ttl=30)
 def api_history():
     """
     Query param: phone=whatsapp:+91...
     Returns last 50 meetings for the user (id, title, created_at, summary_exists)
     """
-    try:
-        phone = request.args.get("phone")
-        if not phone:
-            return jsonify({"error": "phone query param required"}), 400
-        with get_conn() as conn, conn.cursor() as cur:
-            cur.execute("SELECT id, audio_file, summary, created_at FROM meeting_notes WHERE phone=%s ORDER BY id DESC LIMIT 50", (phone,))
-            rows = cur.fetchall()
-            normalized = []
-            for r in rows or []:
-                if hasattr(r, "get"):
-                    normalized.append({"id": r.get("id"), "audio_file": r.get("audio_file"), "summary_exists": bool(r.get("summary")), "created_at": r.get("created_at")})
-                else:
-                    normalized.append({"id": r[0], "audio_file": r[1], "summary_exists": bool(r[2]), "created_at": r[3]})
-            return jsonify({"meetings": normalized}), 200
-    except Exception as e:
-        debug_print("api_history error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+    phone = request.args.get("phone")
+    if not phone:
+        return jsonify({"error": "phone query param required"}), 400
+    # summary_exists is computed in Postgres so the encrypted summaries never cross the wire
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT id, audio_file, (summary IS NOT NULL) AS summary_exists, created_at FROM meeting_notes WHERE phone=%s ORDER BY id DESC LIMIT 50", (phone,))
+        rows = cur.fetchall()
+    normalized = [
+        {"id": r[0], "audio_file": r[1], "summary_exists": r[2], "created_at": r[3].isoformat() if r[3] else None}
+        for r in rows or []
+    ]
+    return jsonify({"meetings": normalized}), 200
 
 
 
@@ -1247,263 +1580,268 @@ def api_history():
 # ===== NEW FEATURES: Voice Tasks & Scheduled Reminders =====
 
 @app.route("/api/meeting/<int:meeting_id>/extract-tasks", methods=["POST"])
+@safe_endpoint
 def api_extract_tasks_from_voice(meeting_id):
     """
     Extract tasks from voice note transcript.
     Enqueues voice task extraction job.
     Returns: {"status": "processing", "job_id": "..."}
     """
-    try:
-        if not queue:
-            return jsonify({"error": "queue not available"}), 503
-        
-        job = queue.enqueue(
-            "worker_multilang_production_fixed_clean.extract_tasks_from_voice_job",
-            meeting_id,
-            job_timeout=60 * 10,
-            result_ttl=60 * 60
-        )
-        
-        return jsonify({
-            "status": "processing",
-            "job_id": job.id,
-            "message": "Extracting tasks from voice note..."
-        }), 200
-    except Exception as e:
-        debug_print("api_extract_tasks_from_voice error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+    if not queue:
+        return jsonify({"error": "queue not available"}), 503
+    
+    job = queue.enqueue(
+        "worker_multilang_production_fixed_clean.extract_tasks_from_voice_job",
+        meeting_id,
+        job_timeout=60 * 10,
+        result_ttl=60 * 60
+    )
+    
+    return jsonify({
+        "status": "processing",
+        "job_id": job.id,
+        "message": "Extracting tasks from voice note..."
+    }), 200
 
 
 @app.route("/api/meeting/<int:meeting_id>/extract-reminders", methods=["POST"])
+@safe_endpoint
 def api_extract_custom_reminders(meeting_id):
     """
     Extract custom reminders from voice note transcript.
     Returns: {"reminders": [...], "count": N}
     """
-    try:
-        # Get transcript and phone
-        with get_conn() as conn, conn.cursor() as cur:
-            cur.execute("SELECT transcript, phone FROM meeting_notes WHERE id=%s", (meeting_id,))
-            row = cur.fetchone()
-            if not row:
-                return jsonify({"error": "meeting not found"}), 404
-            
-            transcript_enc = row[0] if not hasattr(row, "get") else row.get("transcript")
-            phone = row[1] if not hasattr(row, "get") else row.get("phone")
-            
-            if not transcript_enc:
-                return jsonify({"error": "transcript not available"}), 400
-            
-            # Decrypt if needed
-            try:
-                transcript = decrypt_sensitive_data(transcript_enc)
-            except:
-                transcript = transcript_enc  # Not encrypted
+    if extract_custom_reminders is None:
+        return jsonify({"error": "feature unavailable"}), 503
+    # Get transcript and phone
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT transcript, phone FROM meeting_notes WHERE id=%s", (meeting_id,))
+        row = cur.fetchone()
+        if not row:
+            return jsonify({"error": "meeting not found"}), 404
         
-        # Extract custom reminders
-        from custom_reminders import extract_custom_reminders
-        reminders = extract_custom_reminders(transcript, phone, meeting_id)
+        transcript_enc, phone = row[0], row[1]
         
-        return jsonify({
-            "reminders": reminders,
-            "count": len(reminders)
-        }), 200
+        if not transcript_enc:
+            return jsonify({"error": "transcript not available"}), 400
         
-    except Exception as e:
-        debug_print("api_extract_custom_reminders error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+        # Decrypt if needed
+        try:
+            transcript = decrypt_sensitive_data(transcript_enc)
+        except:
+            transcript = transcript_enc  # Not encrypted
+    
+    # Extract custom reminders
+    reminders = extract_custom_reminders(transcript, phone, meeting_id)
+    
+    return jsonify({
+        "reminders": reminders,
+        "count": len(reminders)
+    }), 200
 
 
 @app.route("/api/tasks", methods=["GET"])
+@safe_endpoint
+@conditional_get(0)  # tasks change on complete/snooze: always revalidate, 304 saves the body
 def api_get_tasks():
     """
     Query params: phone=..., status=open|done (default: open)
     Returns user's tasks
     """
-    try:
-        phone = request.args.get("phone")
-        status = request.args.get("status", "open")
-        if not phone:
-            return jsonify({"error": "phone required"}), 400
-        
-        user = get_user_by_phone(phone)
-        if not user:
-            return jsonify({"tasks": []}), 200
-        
-        from db import get_tasks_for_user
-        tasks = get_tasks_for_user(user['id'], status=status, limit=100)
-        return jsonify({"tasks": tasks}), 200
-    except Exception as e:
-        debug_print("api_get_tasks error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+    phone = request.args.get("phone")
+    status = request.args.get("status", "open")
+    if not phone:
+        return jsonify({"error": "phone required"}), 400
+    
+    user = get_user_by_phone(phone)
+    if not user:
+        return jsonify({"tasks": []}), 200
+    
+    tasks = get_tasks_for_user(user['id'], status=status, limit=100)
+    return jsonify({"tasks": tasks}), 200
 
 
 @app.route("/api/task/<int:task_id>/complete", methods=["POST"])
+@safe_endpoint
 def api_complete_task(task_id):
     """
     Mark task as done.
     Returns: {"status": "completed", "task": {...}}
     """
-    try:
-        from db import mark_task_done
-        task = mark_task_done(task_id)
-        if not task:
-            return jsonify({"error": "task not found"}), 404
-        return jsonify({"status": "completed", "task": task}), 200
-    except Exception as e:
-        debug_print("api_complete_task error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+    task = mark_task_done(task_id)
+    if not task:
+        return jsonify({"error": "task not found"}), 404
+    return jsonify({"status": "completed", "task": task}), 200
+
+
+# Reminder fan-outs loop over every user and can run for minutes: keep them off the web worker
+FANOUT_JOB_TIMEOUT_SECONDS = 30 * 60
+
+def _enqueue_fanout_job(func_path):
+    """Enqueue a scheduled-reminder fan-out by dotted path (202 + job_id); run it inline if the queue is down."""
+    if queue:
+        job = queue.enqueue(func_path, job_timeout=FANOUT_JOB_TIMEOUT_SECONDS, result_ttl=60 * 60)
+        return jsonify({"job_id": job.id, "status": "queued"}), 202
+    module_name, func_name = func_path.rsplit(".", 1)
+    sent = getattr(importlib.import_module(module_name), func_name)()
+    return jsonify({"sent": sent}), 200
 
 
 @app.route("/api/reminders/send-morning", methods=["POST"])
+@safe_endpoint
 def api_send_morning_reminders():
     """
     Admin endpoint to manually trigger morning reminders.
-    Returns: {"sent": count}
+    Returns: 202 {"job_id": "...", "status": "queued"} (result: sent count)
     """
-    try:
-        from scheduled_reminders import schedule_morning_reminders
-        sent = schedule_morning_reminders()
-        return jsonify({"sent": sent}), 200
-    except Exception as e:
-        debug_print("api_send_morning_reminders error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+    return _enqueue_fanout_job("scheduled_reminders.schedule_morning_reminders")
 
 
 @app.route("/api/reminders/send-evening", methods=["POST"])
+@safe_endpoint
 def api_send_evening_summaries():
     """
     Admin endpoint to manually trigger evening summaries.
-    Returns: {"sent": count}
+    Returns: 202 {"job_id": "...", "status": "queued"} (result: sent count)
     """
-    try:
-        from scheduled_reminders import schedule_evening_summaries
-        sent = schedule_evening_summaries()
-        return jsonify({"sent": sent}), 200
-    except Exception as e:
-        debug_print("api_send_evening_summaries error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+    return _enqueue_fanout_job("scheduled_reminders.schedule_evening_summaries")
 
 # ===== ADVANCED FEATURES: Interactive Task Completion =====
 
 @app.route("/api/task/complete-by-response", methods=["POST"])
+@safe_endpoint
 def api_complete_task_by_response():
     """
     Complete task based on user WhatsApp response.
     Request: {"phone": "...", "response": "Done 1"}
     Returns: {"success": true, "message": "..."}
     """
-    try:
-        data = request.get_json()
-        phone = data.get("phone")
-        response = data.get("response")
-        
-        if not phone or not response:
-            return jsonify({"error": "phone and response required"}), 400
-        
-        from advanced_features import parse_task_completion_response
-        result = parse_task_completion_response(response, phone)
-        
-        if result is None:
-            return jsonify({"error": "not a task completion response"}), 400
-        
-        return jsonify(result), 200 if result['success'] else 400
-    except Exception as e:
-        debug_print("api_complete_task_by_response error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+    if parse_task_completion_response is None:
+        return jsonify({"error": "feature unavailable"}), 503
+    data = request.get_json()
+    phone = data.get("phone")
+    response = data.get("response")
+    
+    if not phone or not response:
+        return jsonify({"error": "phone and response required"}), 400
+    
+    result = parse_task_completion_response(response, phone)
+    
+    if result is None:
+        return jsonify({"error": "not a task completion response"}), 400
+    
+    return jsonify(result), 200 if result['success'] else 400
 
 
 @app.route("/api/tasks/grouped", methods=["GET"])
+@safe_endpoint
 def api_get_tasks_grouped():
     """
     Get tasks grouped by project/client.
     Query params: phone=...
     Returns: {"grouped": {"Project1": [...], "Project2": [...]}}
     """
-    try:
-        phone = request.args.get("phone")
-        if not phone:
-            return jsonify({"error": "phone required"}), 400
-        
-        from advanced_features import get_tasks_grouped_by_project
-        grouped = get_tasks_grouped_by_project(phone)
-        
-        return jsonify({"grouped": grouped}), 200
-    except Exception as e:
-        debug_print("api_get_tasks_grouped error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+    if get_tasks_grouped_by_project is None:
+        return jsonify({"error": "feature unavailable"}), 503
+    phone = request.args.get("phone")
+    if not phone:
+        return jsonify({"error": "phone required"}), 400
+    
+    grouped = get_tasks_grouped_by_project(phone)
+    
+    return jsonify({"grouped": grouped}), 200
 
 
 @app.route("/api/reminders/send-checkin", methods=["POST"])
+@safe_endpoint
 def api_send_task_checkin():
     """
     Admin endpoint to manually trigger task check-in.
-    Returns: {"sent": count}
+    Returns: 202 {"job_id": "...", "status": "queued"} (result: sent count)
     """
-    try:
-        from advanced_features import schedule_task_checkins
-        sent = schedule_task_checkins()
-        return jsonify({"sent": sent}), 200
-    except Exception as e:
-        debug_print("api_send_task_checkin error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+    return _enqueue_fanout_job("advanced_features.schedule_task_checkins")
 
 
 @app.route("/api/reminders/send-custom", methods=["POST"])
+@safe_endpoint
 def api_send_custom_reminders():
     """
     Admin endpoint to manually trigger custom reminders check.
-    Returns: {"sent": count}
+    Returns: 202 {"job_id": "...", "status": "queued"} (result: sent count)
     """
-    try:
-        from custom_reminders import check_and_send_custom_reminders
-        sent = check_and_send_custom_reminders()
-        return jsonify({"sent": sent}), 200
-    except Exception as e:
-        debug_print("api_send_custom_reminders error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+    return _enqueue_fanout_job("custom_reminders.check_and_send_custom_reminders")
 
 
 @app.route("/api/reminders/send-weekly", methods=["POST"])
+@safe_endpoint
 def api_send_weekly_summary():
     """
     Admin endpoint to manually trigger weekly summary.
-    Returns: {"sent": count}
+    Returns: 202 {"job_id": "...", "status": "queued"} (result: sent count)
     """
-    try:
-        from advanced_features import schedule_weekly_summaries
-        sent = schedule_weekly_summaries()
-        return jsonify({"sent": sent}), 200
-    except Exception as e:
-        debug_print("api_send_weekly_summary error:", e, traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+    return _enqueue_fanout_job("advanced_features.schedule_weekly_summaries")
 
 # --- Add these new routes to your app.py ---
 
-@app.route('/terms.html')
-def terms():
-    return render_template('terms.html')
+# Legal pages are plain HTML (no Jinja): send the files as-is with a day of public caching,
+# so browsers/CDNs revalidate rarely and repeat hits are 304s served via sendfile
+LEGAL_PAGES = ("terms", "privacy", "refund", "shipping", "contact")
+LEGAL_PAGE_MAX_AGE = 24 * 60 * 60
 
-@app.route('/privacy.html')
-def privacy():
-    return render_template('privacy.html')
+def _legal_page(page):
+    resp = send_from_directory(template_dir, f"{page}.html", max_age=LEGAL_PAGE_MAX_AGE)
+    resp.cache_control.public = True
+    return resp
 
-@app.route('/refund.html')
-def refund():
-    return render_template('refund.html')
+for _page in LEGAL_PAGES:
+    # endpoint names unchanged (url_for('terms') etc.)
+    app.add_url_rule(f"/{_page}.html", endpoint=_page, view_func=functools.partial(_legal_page, _page))
 
-@app.route('/shipping.html')
-def shipping():
-    return render_template('shipping.html')
+def _exec_gunicorn(port):
+    """
+    Replace this process with Gunicorn serving app:app. Defaults match the Dockerfile CMD
+    (2 gthread workers x 4 threads); raise WEB_CONCURRENCY with care, since every worker opens
+    its own pool of up to DB_POOL_MAX Postgres connections.
+    WEB_WORKER_CLASS=gevent runs async workers (WEB_WORKER_CONNECTIONS concurrent requests
+    each) for the IO-bound routes.
+    exec (rather than embedding gunicorn.app.base) so workers import app.py fresh and
+    nothing initialised in this process (scheduler, DB pool, Redis, log listener) is forked.
+    """
+    workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+    threads = int(os.getenv("WEB_THREADS", "4"))
+    # keep polling clients' connections open between requests (gunicorn's default is 2s)
+    keepalive = int(os.getenv("WEB_KEEPALIVE", "15"))
+    worker_class = os.getenv("WEB_WORKER_CLASS", "gthread")
+    argv = [
+        sys.executable, "-m", "gunicorn", "app:app",
+        "--bind", f"0.0.0.0:{port}",
+        "--workers", str(workers),
+        "--worker-class", worker_class,
+        "--timeout", "120",
+        "--keep-alive", str(keepalive),
+    ]
+    if worker_class == "gevent":
+        argv += ["--worker-connections", os.getenv("WEB_WORKER_CONNECTIONS", "1000")]
+    else:
+        argv += ["--threads", str(threads)]
+    logger.info("Starting gunicorn on port %s (%s workers, %s)", port, workers, worker_class)
+    _log_listener.stop()  # flush queued records before exec
+    os.execv(sys.executable, argv)
 
-@app.route('/contact.html')
-def contact():
-    return render_template('contact.html')
 
 if __name__ == "__main__":
     flask_debug = str(os.getenv("FLASK_DEBUG", "0")).lower() in ("1", "true", "yes")
-    debug_print("Starting Flask multilang app (FLASK_DEBUG=%s) on port %s" % (flask_debug, os.getenv("PORT", "5000")))
+    port = int(os.getenv("PORT", 5000))
     if TEST_MODE:
         app.run(host="0.0.0.0", port=5000, debug=True)
+    elif flask_debug:
+        logger.info("Starting Flask dev server (FLASK_DEBUG=1) on port %s", port)
+        app.run(host="0.0.0.0", port=port, debug=True)
     else:
-        app.run(host="0.0.0.0", port=int(os.getenv("PORT", 5000)), debug=flask_debug)
+        try:
+            import gunicorn  # noqa: F401  (not available on Windows)
+        except ImportError:
+            logger.warning("gunicorn not installed; falling back to the Flask dev server")
+            app.run(host="0.0.0.0", port=port, debug=False)
+        else:
+            _exec_gunicorn(port)
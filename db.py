@@ -3,6 +3,8 @@ from utils import normalize_phone_for_db
 from datetime import datetime, timedelta
 from contextlib import contextmanager
 import os
+import re
+import threading
 import json
 import uuid 
 
@@ -19,29 +21,135 @@ IS_POSTGRES = DB_URL.startswith('postgresql:') or DB_URL.startswith('postgres:')
 if IS_POSTGRES:
     try:
         import psycopg2
-        from psycopg2.extras import RealDictCursor
+        import psycopg2.extensions
+        import psycopg2.pool
+        from psycopg2.extras import RealDictCursor, execute_values
         PSYCOPG_VERSION = 2
     except ImportError:
         import psycopg
         from psycopg.rows import dict_row
         PSYCOPG_VERSION = 3
 
+# Connection pool (psycopg2). Created lazily so each gunicorn/RQ process gets its own.
+# DATABASE_URL may also point at PgBouncer; in its transaction pooling mode session-level
+# PREPAREd statements don't survive between transactions, so set DB_PREPARE_STATEMENTS=0.
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "20"))
+DB_PREPARE_STATEMENTS = os.getenv("DB_PREPARE_STATEMENTS", "1").lower() not in ("0", "false", "no")
+_pool = None
+_pool_lock = threading.Lock()
+
+# Hot webhook queries, PREPAREd once on every pooled connection so Postgres skips
+# parse + plan on each call. Positional $n params, each used once and in order.
+PREPARED_STATEMENTS = {
+    "webhook_dedupe": "SELECT 1 FROM meeting_notes WHERE message_sid=$1 LIMIT 1",
+    "reply_context": """
+        SELECT latest.id, latest.pending_state, awaiting.id, awaiting.detected_language
+        FROM (SELECT 1) AS one
+        LEFT JOIN LATERAL (
+            SELECT id, pending_state FROM meeting_notes
+            WHERE phone=$1
+            ORDER BY id DESC LIMIT 1
+        ) latest ON true
+        LEFT JOIN LATERAL (
+            SELECT id, detected_language FROM meeting_notes
+            WHERE phone=$2 AND job_state='awaiting_language_choice'
+            ORDER BY created_at DESC LIMIT 1
+        ) awaiting ON true
+    """,
+    # reminders.user_id is NOT NULL: take it from the task (no row back = unknown task)
+    "reminder_insert": """
+        INSERT INTO reminders (user_id, task_id, remind_at, sent, created_at)
+        SELECT t.user_id, t.id, $1::timestamp, false, now() FROM tasks t WHERE t.id=$2
+        RETURNING id
+    """,
+}
+_PLAIN_SQL = {name: re.sub(r"\$\d+", "%s", sql) for name, sql in PREPARED_STATEMENTS.items()}
+
+
+if IS_POSTGRES and PSYCOPG_VERSION == 2:
+    class _PreparedConnection(psycopg2.extensions.connection):
+        """psycopg2 connection that can record which statements it has prepared."""
+        prepared_statements = frozenset()
+
+    class _PreparingPool(psycopg2.pool.ThreadedConnectionPool):
+        """ThreadedConnectionPool that PREPAREs PREPARED_STATEMENTS on each new connection."""
+
+        def _connect(self, key=None):
+            conn = super()._connect(key)
+            conn.prepared_statements = set()
+            if not DB_PREPARE_STATEMENTS:
+                return conn
+            try:
+                with conn.cursor() as cur:
+                    for name, sql in PREPARED_STATEMENTS.items():
+                        cur.execute(f"PREPARE {name} AS {sql}")
+                        conn.prepared_statements.add(name)
+                conn.commit()
+            except Exception as e:
+                # e.g. tables not created yet on a fresh DB; execute_prepared falls back to plain SQL
+                conn.rollback()
+                print("PREPARE skipped on new pooled connection:", e)
+            return conn
+
+def execute_prepared(cur, name, params):
+    """Run a PREPARED_STATEMENTS entry: EXECUTE if this connection has it prepared, else plain SQL."""
+    if name in getattr(cur.connection, "prepared_statements", ()):
+        cur.execute(f"EXECUTE {name}({', '.join(['%s'] * len(params))})", params)
+    else:
+        cur.execute(_PLAIN_SQL[name], params)
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _PreparingPool(DB_POOL_MIN, DB_POOL_MAX, DB_URL, connection_factory=_PreparedConnection)
+    return _pool
+
+def _release_pooled(pool, conn):
+    """Return conn to the pool clean: roll back anything left open, drop broken connections."""
+    try:
+        if conn.closed:
+            pool.putconn(conn, close=True)
+            return
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+        pool.putconn(conn)
+    except Exception:
+        try:
+            pool.putconn(conn, close=True)
+        except Exception:
+            pass
+
 @contextmanager
 def get_conn():
     """
     Yields a PostgreSQL connection.
+    With psycopg2 the connection is borrowed from a per-process pool and any
+    uncommitted transaction is rolled back on return (same effect as the old close()).
     """
+    pool = None
     if PSYCOPG_VERSION == 2:
-        conn = psycopg2.connect(DB_URL)
+        pool = _get_pool()
+        try:
+            conn = pool.getconn()
+        except psycopg2.pool.PoolError:
+            # pool exhausted: fall back to a one-off connection rather than failing the request
+            pool = None
+            conn = psycopg2.connect(DB_URL)
     else:
         conn = psycopg.connect(DB_URL)
     try:
         yield conn
     finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
+        if pool is not None:
+            _release_pooled(pool, conn)
+        else:
+            try:
+                conn.close()
+            except Exception:
+                pass
 
 @contextmanager
 def get_cursor():
@@ -239,6 +347,10 @@ def init_db():
         # Multilang indexes
         cur.execute("CREATE INDEX IF NOT EXISTS idx_meeting_notes_job_state ON meeting_notes(job_state, created_at);")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_meeting_notes_language_choice ON meeting_notes(phone, id, chosen_language) WHERE chosen_language IS NOT NULL;")
+        # /api/history: WHERE phone=%s ORDER BY id DESC LIMIT 50 (leading phone column also serves the users JOIN)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_meeting_notes_phone_id_desc ON meeting_notes(phone, id DESC) INCLUDE (audio_file, created_at);")
+        # Numbered-reply lookup of the meeting awaiting a summary language; partial, so it only holds active rows
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_meeting_notes_awaiting_language ON meeting_notes(phone, created_at DESC) INCLUDE (id, detected_language) WHERE job_state='awaiting_language_choice';")
         
         # Update existing records to have proper job_state
         cur.execute("""
@@ -540,9 +652,6 @@ def record_payment(phone, razorpay_payment_id, amount, currency="INR", status="c
         conn.commit()
         if not row:
             return None, None
-        # handle RealDictCursor vs tuple
-        if isinstance(row, dict):
-            return row.get("id"), row.get("status")
         return row[0], row[1]
 
 
@@ -596,19 +705,19 @@ def save_meeting_notes_with_sid(raw_phone, audio_file, transcript, summary, mess
     """
     phone = normalize_phone_for_db(raw_phone)
     with get_conn() as conn, conn.cursor() as cur:
-        if message_sid:
-            cur.execute("SELECT 1 FROM meeting_notes WHERE message_sid=%s LIMIT 1", (message_sid,))
-            if cur.fetchone():
-                return {"skipped": True, "id": None}
-
+        # The partial unique index on message_sid decides duplicates atomically: no row back
+        # means another delivery of this message already inserted it (NULL sids never conflict)
         cur.execute("""
             INSERT INTO meeting_notes (phone, audio_file, transcript, summary, message_sid, created_at)
             VALUES (%s, %s, %s, %s, %s, now())
+            ON CONFLICT (message_sid) WHERE message_sid IS NOT NULL DO NOTHING
             RETURNING id
         """, (phone, audio_file, transcript, summary, message_sid))
         row = cur.fetchone()
         conn.commit()
-        return {"skipped": False, "id": row[0] if row else None}
+        if row is None:
+            return {"skipped": True, "id": None}
+        return {"skipped": False, "id": row[0]}
 
 
 
@@ -661,35 +770,56 @@ def get_user_credits(raw_phone):
         row = cur.fetchone()
         return float(row[0]) if row and row[0] is not None else 0.0
     
+# Credit reservation in one statement: lock the user row, deduct if the balance covers it
+# (and no active subscription), or create a new user with the starting balance already
+# deducted. The lock is held only for this statement + commit, not across Python code.
+NEW_USER_CREDITS = 30.0
+
+_RESERVE_MINUTES_SQL = """
+    WITH old AS (
+        SELECT credits_remaining,
+               COALESCE(subscription_active, FALSE)
+                   AND (subscription_expiry IS NULL OR subscription_expiry > (now() AT TIME ZONE 'UTC')) AS unlimited
+        FROM users WHERE phone = %(phone)s
+        FOR UPDATE
+    ), upd AS (
+        UPDATE users u SET credits_remaining = u.credits_remaining - %(minutes)s
+        FROM old
+        WHERE u.phone = %(phone)s AND NOT old.unlimited AND COALESCE(old.credits_remaining, 0) >= %(minutes)s
+        RETURNING u.credits_remaining
+    ), ins AS (
+        INSERT INTO users (phone, credits_remaining)
+        SELECT %(phone)s, %(new_credits)s - %(minutes)s
+        WHERE NOT EXISTS (SELECT 1 FROM old) AND %(new_credits)s >= %(minutes)s
+        ON CONFLICT (phone) DO NOTHING
+        RETURNING credits_remaining
+    )
+    SELECT EXISTS (SELECT 1 FROM old), old.unlimited, old.credits_remaining, upd.credits_remaining, ins.credits_remaining
+    FROM (SELECT 1) AS one
+    LEFT JOIN old ON TRUE LEFT JOIN upd ON TRUE LEFT JOIN ins ON TRUE
+"""
+
 def decrement_minutes_if_available(raw_phone, minutes_to_deduct: float):
     phone = normalize_phone_for_db(raw_phone)
-    with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
-
-        # fetch current values
-        cur.execute("SELECT credits_remaining, subscription_active, subscription_expiry FROM users WHERE phone = %s FOR UPDATE", (phone,))
-        row = cur.fetchone()
-        if not row:
-            # user missing — create default
-            cur.execute("INSERT INTO users (phone, credits_remaining) VALUES (%s, %s) RETURNING credits_remaining", (phone, 30.0))
-            row = cur.fetchone()
-
-        # If subscription active & not expired, allow unlimited (or don't decrement)
-        sub_active = bool(row.get('subscription_active'))
-        expiry = row.get('subscription_expiry')
-        from datetime import datetime, timezone
-        now = datetime.now(timezone.utc)
-        if sub_active and (expiry is None or expiry > now):
-            # subscription active: do not deduct (or deduct differently)
+    params = {"phone": phone, "minutes": minutes_to_deduct, "new_credits": NEW_USER_CREDITS}
+    with get_conn() as conn, conn.cursor() as cur:
+        # second pass only when a concurrent request created the same new user first
+        for _ in range(2):
+            cur.execute(_RESERVE_MINUTES_SQL, params)
+            existed, unlimited, current, updated, inserted = cur.fetchone()
             conn.commit()
-            return {"ok": True, "deducted": 0.0, "remaining": row.get('credits_remaining')}
-
-        current = float(row.get('credits_remaining') or 0.0)
-        if current < minutes_to_deduct:
-            return {"ok": False, "reason": "insufficient_credits", "remaining": current}
-        new_remaining = current - minutes_to_deduct
-        cur.execute("UPDATE users SET credits_remaining = %s WHERE phone = %s", (new_remaining, phone))
-        conn.commit()
-        return {"ok": True, "deducted": minutes_to_deduct, "remaining": new_remaining}
+            if unlimited:
+                # subscription active: do not deduct
+                return {"ok": True, "deducted": 0.0, "remaining": current}
+            if updated is not None:
+                return {"ok": True, "deducted": minutes_to_deduct, "remaining": float(updated)}
+            if inserted is not None:
+                return {"ok": True, "deducted": minutes_to_deduct, "remaining": float(inserted)}
+            if existed:
+                return {"ok": False, "reason": "insufficient_credits", "remaining": float(current or 0.0)}
+            if NEW_USER_CREDITS < minutes_to_deduct:
+                return {"ok": False, "reason": "insufficient_credits", "remaining": NEW_USER_CREDITS}
+        return {"ok": False, "reason": "insufficient_credits", "remaining": 0.0}
 
 
 
@@ -717,6 +847,64 @@ def create_task(phone_or_user_id, title, description=None, due_at=None, priority
         conn.commit()
         return dict(row) if row else None
 
+def create_tasks_bulk(phone_or_user_id, tasks, source='whatsapp'):
+    """
+    Insert many tasks for one user in a single round-trip.
+    `tasks` is a list of dicts with keys: title, description, due_at, priority, metadata, recurring_rule.
+    Returns the created task rows as dicts, in input order.
+    """
+    if not tasks:
+        return []
+    if isinstance(phone_or_user_id, str):
+        user_id = get_or_create_user(phone_or_user_id)['id']
+    else:
+        user_id = int(phone_or_user_id)
+
+    rows = [
+        (user_id, t["title"], t.get("description"), t.get("due_at"), t.get("priority", 3),
+         source, json.dumps(t.get("metadata") or {}), t.get("recurring_rule"))
+        for t in tasks
+    ]
+    with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        created = execute_values(cur, """
+            INSERT INTO tasks (user_id, title, description, due_at, priority, source, metadata, recurring_rule, created_at, updated_at)
+            VALUES %s
+            RETURNING *;
+        """, rows, template="(%s, %s, %s, %s, %s, %s, %s, %s, now(), now())", page_size=len(rows), fetch=True)
+        conn.commit()
+    # SERIAL ids are assigned in VALUES order within one statement
+    return sorted((dict(r) for r in created), key=lambda r: r["id"])
+
+def create_reminders_bulk(reminders):
+    """
+    Insert many (task_id, remind_at) reminders in one statement + one commit.
+    Returns [{"id", "task_id"}] for the rows created; unknown task ids are skipped.
+    """
+    if not reminders:
+        return []
+    with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        created = execute_values(cur, """
+            INSERT INTO reminders (user_id, task_id, remind_at, sent, created_at)
+            SELECT t.user_id, t.id, v.remind_at::timestamp, false, now()
+            FROM (VALUES %s) AS v(task_id, remind_at)
+            JOIN tasks t ON t.id = v.task_id::int
+            RETURNING id, task_id
+        """, reminders, page_size=len(reminders), fetch=True)
+        conn.commit()
+    return sorted((dict(r) for r in created), key=lambda r: r["id"])
+
+def update_pending_states(updates):
+    """Apply many (meeting_id, pending_state) updates in one statement + one commit."""
+    if not updates:
+        return
+    with get_conn() as conn, conn.cursor() as cur:
+        execute_values(cur, """
+            UPDATE meeting_notes AS m SET pending_state = v.state
+            FROM (VALUES %s) AS v(id, state)
+            WHERE m.id = v.id
+        """, updates, template="(%s::int, %s::text)", page_size=len(updates))
+        conn.commit()
+
 def get_tasks_for_user(phone_or_user_id, status='open', limit=50):
     with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
         if isinstance(phone_or_user_id, str):
@@ -822,9 +1010,11 @@ def add_tag(task_id, tag):
 
 def set_user_language(phone, language_code):
     """Set user's preferred language"""
+    from db_multilang import invalidate_user_language  # local import: db_multilang imports db
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute("UPDATE users SET preferred_language = %s WHERE phone = %s", (language_code, phone))
         conn.commit()
+    invalidate_user_language(phone)
 
 def get_user_language(phone):
     """Get user's preferred language, default to Hindi"""
@@ -836,6 +1026,7 @@ def update_user_language(phone: str, language_code: str):
     Set or update the user's preferred language in the users table.
     Returns the updated row as a dict (id, phone, language) or None on failure.
     """
+    from db_multilang import invalidate_user_language  # local import: db_multilang imports db
     try:
         with get_conn() as conn, conn.cursor() as cur:
             # Try to update existing user
@@ -860,6 +1051,9 @@ def update_user_language(phone: str, language_code: str):
 
     except Exception as e:
         print("DB: update_user_language error:", e)
+    finally:
+        # don't let the 1 h cached language outlive this write
+        invalidate_user_language(phone)
     return None
 
 
@@ -1145,13 +1339,7 @@ def get_user_state(phone):
         row = cur.fetchone()
         
         if row:
-            # Handle RealDictCursor or tuple
-            if isinstance(row, dict):
-                state = row.get('current_state')
-                meta = row.get('state_metadata')
-            else:
-                state = row[0]
-                meta = row[1]
+            state, meta = row[0], row[1]
                 
             # Parse JSON if it comes back as a string (depends on driver)
             if isinstance(meta, str):
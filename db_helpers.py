@@ -1,9 +1,11 @@
 # db_helpers.py
 import json
-import traceback
+import logging
 from typing import Optional, Dict, Any
 from db import get_conn  # adapt import if your db helper has a different name
 
+logger = logging.getLogger("mina.db_helpers")
+
 def get_meeting_status(meeting_id: int) -> Optional[Dict[str, Any]]:
     """
     Lightweight: return meeting_id, status (PENDING|PROCESSING|DONE|FAILED), progress (0-100|null), error.
@@ -28,7 +30,7 @@ def get_meeting_status(meeting_id: int) -> Optional[Dict[str, Any]]:
             }
     except Exception as e:
         # If get_conn uses logging on exception, that's fine — bubble up as None for not found
-        print("get_meeting_status error:", e, traceback.format_exc())
+        logger.exception("get_meeting_status error: %s", e)
         return None
 
 def get_meeting_detail(meeting_id: int) -> Optional[Dict[str, Any]]:
@@ -69,5 +71,5 @@ def get_meeting_detail(meeting_id: int) -> Optional[Dict[str, Any]]:
                 "error": None
             }
     except Exception as e:
-        print("get_meeting_detail error:", e, traceback.format_exc())
+        logger.exception("get_meeting_detail error: %s", e)
         return None
@@ -1,11 +1,13 @@
 # db_multilang.py - Database functions for multi-language support
 import os
+import hashlib
 from dotenv import load_dotenv
 
 # Load environment variables first
 load_dotenv()
 
 from db import get_conn, get_user
+from redis_conn import get_redis_conn_or_raise
 
 def init_multilang_db():
     """Add language preference column if not exists"""
@@ -13,29 +15,74 @@ def init_multilang_db():
         cur.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS preferred_language TEXT DEFAULT 'hi';")
         conn.commit()
 
+# preferred_language is read on every summary / menu reply but changes only when the user picks
+# a language: keep it in Redis (shared by all web workers) and write through on set.
+USER_LANGUAGE_CACHE_TTL_SECONDS = 60 * 60
+
+_redis = None
+
+def _get_redis():
+    """Lazily connect to Redis; returns None if it is not configured / reachable."""
+    global _redis
+    if _redis is None:
+        try:
+            _redis = get_redis_conn_or_raise()
+        except Exception as e:
+            print(f"Warning: user language cache disabled, Redis unavailable: {e}")
+            return None
+    return _redis
+
+def _user_language_key(phone):
+    return "ulang:" + hashlib.blake2b(phone.encode("utf-8"), digest_size=16).hexdigest()
+
+def invalidate_user_language(phone):
+    """Drop the cached preferred_language for phone; for writers that bypass set_user_language (db.py)."""
+    r = _get_redis()
+    if r and phone:
+        try:
+            r.delete(_user_language_key(phone))
+        except Exception as e:
+            print(f"Warning: user language cache invalidation failed for {phone}: {e}")
+
 def set_user_language(phone, language_code):
     """Set user's preferred language"""
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute("UPDATE users SET preferred_language = %s WHERE phone = %s", (language_code, phone))
         conn.commit()
+    r = _get_redis()
+    if r and phone:
+        try:
+            r.setex(_user_language_key(phone), USER_LANGUAGE_CACHE_TTL_SECONDS, language_code or 'hi')
+        except Exception as e:
+            print(f"Warning: user language cache set failed for {phone}: {e}")
 
 def get_user_language(phone):
     """Get user's preferred language, default to Hindi"""
-    try:
-        user = get_user(phone)
-        if user:
-            if hasattr(user, 'get'):
-                lang = user.get('preferred_language')
-                return lang if lang else 'hi'
-            elif hasattr(user, '__getitem__') and len(user) > 6:
-                lang = user[6] if len(user) > 6 else None
-                return lang if lang else 'hi'
-            else:
-                return 'hi'
+    if not phone:
         return 'hi'
+    r = _get_redis()
+    key = _user_language_key(phone)
+    if r:
+        try:
+            cached = r.get(key)
+            if cached:
+                return cached.decode("utf-8")
+        except Exception as e:
+            print(f"Warning: user language cache get failed for {phone}: {e}")
+    try:
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute("SELECT preferred_language FROM users WHERE phone = %s", (phone,))
+            row = cur.fetchone()
     except Exception as e:
         print(f"Warning: get_user_language failed for {phone}: {e}")
         return 'hi'
+    lang = (row[0] if row else None) or 'hi'
+    if r and row:
+        try:
+            r.setex(key, USER_LANGUAGE_CACHE_TTL_SECONDS, lang)
+        except Exception as e:
+            print(f"Warning: user language cache set failed for {phone}: {e}")
+    return lang
 
 def is_user_language_explicitly_set(phone):
     """Check if user has explicitly set a language preference"""
@@ -5,6 +5,9 @@ Uses AES-256 encryption for transcript and summary columns
 """
 import os
 import base64
+import hashlib
+import threading
+from collections import OrderedDict
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -54,10 +57,37 @@ class DataEncryption:
 # Global instance
 encryptor = DataEncryption()
 
+# Bounded LRU of decrypted plaintext keyed by a BLAKE2b digest of the ciphertext.
+# Fernet tokens are unique per encryption, so equal ciphertext always means equal plaintext;
+# the digest key keeps the (larger) ciphertext itself out of memory.
+DECRYPT_CACHE_SIZE = int(os.getenv("DECRYPT_CACHE_SIZE", "256"))
+_decrypt_cache = OrderedDict()
+_decrypt_cache_lock = threading.Lock()
+
+def clear_decrypt_cache():
+    """Drop all cached plaintext (e.g. after rotating ENCRYPTION_KEY)."""
+    with _decrypt_cache_lock:
+        _decrypt_cache.clear()
+
 def encrypt_sensitive_data(text):
     """Encrypt sensitive data like transcripts and summaries"""
     return encryptor.encrypt(text)
 
 def decrypt_sensitive_data(encrypted_text):
-    """Decrypt sensitive data"""
-    return encryptor.decrypt(encrypted_text)
\ No newline at end of file
+    """Decrypt sensitive data (repeat reads of the same ciphertext are served from an in-process LRU)"""
+    # non-str input (bytes, memoryview) goes straight to DataEncryption.decrypt, which handles it
+    if not encrypted_text or not isinstance(encrypted_text, str) or DECRYPT_CACHE_SIZE <= 0:
+        return encryptor.decrypt(encrypted_text)
+    key = hashlib.blake2b(encrypted_text.encode('utf-8'), digest_size=16).digest()
+    with _decrypt_cache_lock:
+        plaintext = _decrypt_cache.get(key)
+        if plaintext is not None:
+            _decrypt_cache.move_to_end(key)
+            return plaintext
+    plaintext = encryptor.decrypt(encrypted_text)
+    if plaintext is not None and plaintext != encrypted_text:  # don't cache the failed-decrypt passthrough
+        with _decrypt_cache_lock:
+            _decrypt_cache[key] = plaintext
+            if len(_decrypt_cache) > DECRYPT_CACHE_SIZE:
+                _decrypt_cache.popitem(last=False)
+    return plaintext
\ No newline at end of file
@@ -1,4 +1,6 @@
 # language_handler_v2.py - Multi-language support (9 languages)
+from functools import lru_cache
+
 SUPPORTED_LANGUAGES = {
     'hi': {'name': 'हिंदी (Hindi)', 'code': 'hi'},
     'en': {'name': 'English', 'code': 'en'},
@@ -11,6 +13,7 @@ SUPPORTED_LANGUAGES = {
     'pa': {'name': 'ਪੰਜਾਬੀ (Punjabi)', 'code': 'pa'}
 }
 
+@lru_cache(maxsize=1)
 def get_language_menu():
     """Generate language selection menu"""
     menu = "🌐 *Select your preferred language:*\n\n"
@@ -30,6 +33,7 @@ def parse_language_choice(choice_text):
         print(f"Warning: Invalid language choice '{choice_text}': {e}")
     return None
 
+@lru_cache(maxsize=32)
 def get_language_name(code):
     """Get language display name"""
     try:
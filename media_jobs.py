@@ -0,0 +1,314 @@
+# media_jobs.py - Background handling of incoming WhatsApp media
+"""
+Twilio media -> GCS ingestion for the WhatsApp webhook.
+app.py enqueues handle_incoming_media on RQ and answers Twilio with 204 straight away;
+the RQ worker does the download + GCS upload + transcription job insert.
+When no queue is available app.py runs the same function on a background thread.
+
+Importable without Flask so the worker doesn't have to load app.py.
+"""
+
+import os
+import json
+import time
+import shutil
+import threading
+import hashlib
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from google.cloud import storage
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # optional speedup
+    _json_loads = json.loads
+
+try:
+    from google.cloud.storage import transfer_manager
+except ImportError:  # older google-cloud-storage: single-stream uploads only
+    transfer_manager = None
+
+from utils import HTTP_SESSION, TEMP_DIR, temp_dir_free_bytes, send_whatsapp, _twilio_auth_for
+from redis_conn import get_redis_conn_or_raise
+
+logger = logging.getLogger("mina.media_jobs")
+
+# GCS service-account JSON may be supplied inline (e.g. on PaaS); materialise it once per process
+if "GOOGLE_APPLICATION_CREDENTIALS_JSON" in os.environ:
+    creds = _json_loads(os.environ["GOOGLE_APPLICATION_CREDENTIALS_JSON"])
+    creds_path = "/tmp/gcs_creds.json"
+    with open(creds_path, "w") as f:
+        json.dump(creds, f)
+    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = creds_path
+
+# Resumable-upload chunk for streamed media (must be a multiple of 256 KB)
+GCS_UPLOAD_CHUNK_BYTES = 4 * 1024 * 1024
+
+# Media at least this large (by Content-Length) is staged to disk and uploaded as parallel
+# chunks; smaller files keep the single streamed upload (no staging / composition overhead)
+GCS_PARALLEL_UPLOAD_MIN_BYTES = int(os.getenv("GCS_PARALLEL_UPLOAD_MIN_BYTES", str(10 * 1024 * 1024)))
+GCS_PARALLEL_UPLOAD_WORKERS = int(os.getenv("GCS_PARALLEL_UPLOAD_WORKERS", "4"))
+
+# Where large media is staged for the parallel upload. Defaults to TEMP_DIR; point it at real
+# disk when TEMP_DIR is a small tmpfs. Staging only happens when the dir has room for the whole
+# file plus GCS_STAGING_RESERVE_BYTES; otherwise the media is streamed in a single upload instead.
+GCS_STAGING_DIR = os.getenv("GCS_STAGING_DIR") or TEMP_DIR
+GCS_STAGING_RESERVE_BYTES = 64 * 1024 * 1024
+os.makedirs(GCS_STAGING_DIR, exist_ok=True)
+
+# Redis key TTLs for media URL -> GCS path reuse
+MEDIA_GCS_CACHE_TTL_SECONDS = 24 * 60 * 60
+MEDIA_FETCH_LOCK_SECONDS = 120
+
+# V4 signed URLs are valid for SIGNED_URL_EXPIRATION_SECONDS
+SIGNED_URL_EXPIRATION_SECONDS = 20 * 60
+SIGNED_URL_BATCH_WORKERS = 8
+
+_MEDIA_EXT_BY_CONTENT_TYPE = {
+    "audio/mpeg": ".mp3", "audio/mp3": ".mp3", "audio/mp4": ".m4a", "audio/x-m4a": ".m4a",
+    "audio/mp4a-latm": ".m4a", "audio/aac": ".aac", "audio/wav": ".wav", "audio/x-wav": ".wav",
+    "audio/ogg": ".ogg", "audio/opus": ".opus", "audio/webm": ".webm", "audio/amr": ".amr",
+    "audio/3gpp": ".3gp", "video/3gpp": ".3gp", "video/mp4": ".mp4", "audio/x-caf": ".caf", "audio/x-aiff": ".aiff"
+}
+
+def ext_from_content_type(ct: str):
+    """Map a media Content-Type (parameters ignored) to a file extension, or None."""
+    if not ct:
+        return None
+    return _MEDIA_EXT_BY_CONTENT_TYPE.get(ct.split(";", 1)[0].strip().lower())
+
+
+_gcs_client = None
+_gcs_client_lock = threading.Lock()
+
+def get_gcs_client():
+    """
+    Process-wide storage.Client, created on first use. Construction re-reads credentials and
+    detects the project, and its HTTP session is what keeps connections to GCS warm.
+    """
+    global _gcs_client
+    if _gcs_client is None:
+        with _gcs_client_lock:
+            if _gcs_client is None:
+                _gcs_client = storage.Client()
+    return _gcs_client
+
+
+# Credentials used to sign URLs, loaded once. A key file (GCS_SA_KEY_PATH, or the default
+# service-account credentials) signs locally; token-only credentials (GCE / Cloud Run /
+# workload identity) sign via IAM with an access token we refresh only when it expires,
+# instead of google-cloud-storage fetching one from the metadata server per URL.
+_signing_creds = None
+_signing_lock = threading.Lock()
+
+def _signed_url_kwargs():
+    """Keyword arguments for blob.generate_signed_url() that reuse the cached signing credentials."""
+    global _signing_creds
+    from google.oauth2 import service_account
+
+    with _signing_lock:
+        if _signing_creds is None:
+            key_path = os.getenv("GCS_SA_KEY_PATH")
+            if key_path:
+                _signing_creds = service_account.Credentials.from_service_account_file(
+                    key_path, scopes=["https://www.googleapis.com/auth/devstorage.read_write"]
+                )
+            else:
+                import google.auth
+                _signing_creds, _ = google.auth.default(scopes=["https://www.googleapis.com/auth/cloud-platform"])
+        creds = _signing_creds
+        if isinstance(creds, service_account.Credentials):
+            return {"credentials": creds}
+        if not creds.valid:
+            import google.auth.transport.requests
+            creds.refresh(google.auth.transport.requests.Request())
+        return {"service_account_email": creds.service_account_email, "access_token": creds.token}
+
+
+_redis = None
+
+def _get_redis():
+    """Lazily connect to Redis; returns None if it is not configured / reachable."""
+    global _redis
+    if _redis is None:
+        try:
+            _redis = get_redis_conn_or_raise()
+        except Exception as e:
+            logger.warning("Media cache disabled, Redis unavailable: %s", e)
+            return None
+    return _redis
+
+
+def sign_gcs_url(bucket_name, object_name, method="PUT", content_type=None):
+    """
+    Return (signed_url, expires_at_epoch) for a V4 signed URL, signed with the cached credentials
+    (_signed_url_kwargs), so no per-call credential load or metadata-server token fetch.
+    """
+    expires_at = int(time.time()) + SIGNED_URL_EXPIRATION_SECONDS
+    blob = get_gcs_client().bucket(bucket_name).blob(object_name)
+    url = blob.generate_signed_url(
+        version="v4",
+        expiration=SIGNED_URL_EXPIRATION_SECONDS,
+        method=method,
+        content_type=content_type,
+        **_signed_url_kwargs()
+    )
+    return url, expires_at
+
+def sign_gcs_urls(bucket_name, objects, method="PUT"):
+    """
+    Batch sign_gcs_url: objects is a list of (object_name, content_type).
+    Credentials are loaded / refreshed once, then URLs are signed concurrently (bounded by CPU
+    count, since local signing is CPU-bound). Returns [(url, expires_at), ...] in input order.
+    """
+    _signed_url_kwargs()  # load / refresh the signing credentials once, not per thread
+
+    def sign(obj):
+        return sign_gcs_url(bucket_name, obj[0], method, obj[1])
+
+    workers = min(SIGNED_URL_BATCH_WORKERS, os.cpu_count() or 1, len(objects))
+    if workers <= 1:
+        return [sign(obj) for obj in objects]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gcs-sign") as pool:
+        return list(pool.map(sign, objects))
+
+
+def upload_stream_to_gcs(stream, object_name, content_type, size=None, bucket_name=None):
+    """
+    Upload a readable stream to GCS as a chunked resumable upload, without seeking or
+    buffering it whole. Returns the gs:// path.
+    """
+    bucket_name = bucket_name or os.environ["GCS_BUCKET"]
+    blob = get_gcs_client().bucket(bucket_name).blob(object_name)
+    blob.chunk_size = GCS_UPLOAD_CHUNK_BYTES
+    blob.upload_from_file(stream, size=size, rewind=False, content_type=content_type)
+    return f"gs://{bucket_name}/{object_name}"
+
+
+def upload_twilio_media_to_gcs(media_url, content_type, phone=None):
+    bucket_name = os.environ["GCS_BUCKET"]
+    bucket = get_gcs_client().bucket(bucket_name)
+
+    user_segment = phone.replace(":", "").replace("+", "") if phone else "anonymous"
+    timestamp = int(time.time())
+    ext = ext_from_content_type(content_type) or ".ogg"
+
+    object_name = f"uploads/{user_segment}/{timestamp}{ext}"
+
+    # Twilio media requires auth; refuse anything not hosted by Twilio rather than leak it
+    auth = _twilio_auth_for(media_url)
+    if auth is None:
+        raise RuntimeError(f"Not fetching {media_url!r}: not a twilio.com URL, or Twilio credentials not configured")
+
+    # Pipe the Twilio response straight into GCS: never hold the whole file in memory.
+    # rewind=False matters - seeking the socket stream is what used to force full buffering.
+    with HTTP_SESSION.get(media_url, auth=auth, timeout=30, stream=True) as r:
+        r.raise_for_status()
+        r.raw.decode_content = True
+        # Content-Length is the wire size; only trust it when the body isn't content-encoded
+        cl = r.headers.get("Content-Length")
+        size = int(cl) if cl and cl.isdigit() and not r.headers.get("Content-Encoding") else None
+        if transfer_manager and size and size >= GCS_PARALLEL_UPLOAD_MIN_BYTES and _can_stage(size):
+            _upload_parallel(r.raw, bucket.blob(object_name), content_type)
+            return f"gs://{bucket_name}/{object_name}"
+        # resumable upload for large/unknown sizes, sent in bounded chunks
+        return upload_stream_to_gcs(r.raw, object_name, content_type, size=size, bucket_name=bucket_name)
+
+
+def _can_stage(size):
+    """True if GCS_STAGING_DIR can hold a size-byte file and still keep the reserve free."""
+    try:
+        free = temp_dir_free_bytes(GCS_STAGING_DIR)
+    except OSError as e:
+        logger.warning("Can't stat staging dir %s: %s", GCS_STAGING_DIR, e)
+        return False
+    if free - size < GCS_STAGING_RESERVE_BYTES:
+        logger.info("Staging dir %s too full for %s bytes (%s free); streaming upload instead", GCS_STAGING_DIR, size, free)
+        return False
+    return True
+
+def _upload_parallel(stream, blob, content_type):
+    """Stage a large download in GCS_STAGING_DIR, then upload it as concurrent chunks (one TCP stream each)."""
+    tmp = tempfile.NamedTemporaryFile(prefix="mina_media_", dir=GCS_STAGING_DIR, delete=False)
+    staged = tmp.name
+    try:
+        with tmp:
+            shutil.copyfileobj(stream, tmp, GCS_UPLOAD_CHUNK_BYTES)
+        transfer_manager.upload_chunks_concurrently(
+            staged,
+            blob,
+            content_type=content_type,
+            chunk_size=GCS_UPLOAD_CHUNK_BYTES,
+            worker_type=transfer_manager.THREAD,  # the upload is I/O bound; no process spawn
+            max_workers=GCS_PARALLEL_UPLOAD_WORKERS
+        )
+    finally:
+        os.remove(staged)
+
+
+def _media_cache_key(media_url):
+    return "media:gcs:" + hashlib.blake2b(media_url.encode("utf-8"), digest_size=16).hexdigest()
+
+def _upload_media_once(media_url, media_type, sender):
+    """
+    Upload Twilio media to GCS, reusing a cached gs:// path for a URL we've already stored.
+    A short per-URL lock stops concurrent duplicate deliveries from downloading the same file;
+    returns None if another worker holds it.
+    """
+    r = _get_redis()
+    if not r:
+        return upload_twilio_media_to_gcs(media_url=media_url, content_type=media_type, phone=sender)
+
+    key = _media_cache_key(media_url)
+    cached = r.get(key)
+    if cached:
+        return cached.decode("utf-8")
+    if not r.set(key + ":lock", 1, nx=True, ex=MEDIA_FETCH_LOCK_SECONDS):
+        return None
+    try:
+        gcs_path = upload_twilio_media_to_gcs(media_url=media_url, content_type=media_type, phone=sender)
+        r.setex(key, MEDIA_GCS_CACHE_TTL_SECONDS, gcs_path)
+        return gcs_path
+    finally:
+        r.delete(key + ":lock")
+
+
+def handle_incoming_media(payload):
+    """
+    Upload an incoming voice note to GCS and create its transcription job.
+    payload: {"sender", "media_url", "media_type", "message_sid"}
+    """
+    sender = payload["sender"]
+    media_url = payload["media_url"]
+    try:
+        gcs_path = _upload_media_once(media_url, payload.get("media_type") or "", sender)
+        if gcs_path is None:
+            logger.info("Media %s already being fetched by another worker; skipping", media_url)
+            return {"status": "duplicate"}
+
+        logger.debug("Audio uploaded to GCS: %s", gcs_path)
+
+        # Pass GCS path to your existing flow
+        from db import create_transcription_job
+
+        job_id = create_transcription_job(
+                phone=sender,
+                gcs_path=gcs_path
+            )
+
+        send_whatsapp(
+                sender,
+                "🎤 Audio mil gaya. Likh ke bhej raha hoon…"
+            )
+        return {"status": "ok", "transcription_job_id": job_id, "gcs_path": gcs_path}
+
+    except Exception as e:
+        logger.exception("Audio handling failed: %s", e)
+        send_whatsapp(
+            sender,
+            "❌ Audio process karne mein problem aayi. Please try again."
+        )
+        return {"status": "error", "error": str(e)}
@@ -0,0 +1,317 @@
+# meeting_jobs.py - Background jobs for the meeting REST API
+"""
+LLM-backed meeting jobs (summarize / translate / extract action items).
+app.py enqueues these on RQ so the HTTP request doesn't wait on the model;
+worker_runner.py executes them. When no queue is available app.py calls them inline.
+
+Each job returns the same JSON-able dict the endpoint used to return directly.
+Also holds the exact-match LLM result cache shared by the endpoints and the jobs,
+and the short-lived meeting read cache they invalidate when a summary is saved.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import functools
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # optional speedup
+    _json_loads = json.loads
+
+import openai
+import psycopg2
+import requests
+
+from db import get_conn, create_tasks_bulk
+from encryption import encrypt_sensitive_data, decrypt_sensitive_data
+from openai_client_multilang import summarize_text_multilang
+from redis_conn import get_redis_conn_or_raise
+
+logger = logging.getLogger("mina.meeting_jobs")
+
+SUMMARY_INSTRUCTIONS = "Provide a concise meeting summary with bullets, decisions and action items."
+TRANSLATE_INSTRUCTIONS = "Translate the text, do not add extra commentary."
+ACTION_ITEMS_INSTRUCTIONS = (
+    "Extract action items from the meeting transcript and return a JSON array of objects with keys: "
+    "'text' (action text), 'owner' (person or null), 'due' (YYYY-MM-DD or null). "
+    "Return strictly valid JSON only."
+)
+
+_JSON_DECODER = json.JSONDecoder()
+
+def _parse_action_items(reply):
+    """
+    The action-items list from a model reply, or None. A strictly-JSON reply parses in one go;
+    otherwise the reply is scanned for JSON arrays by decoding at each '[' (so brackets inside
+    strings don't cut the array short), preferring the first array of objects over a bracketed
+    aside like "see [1]", and falling back to the first array found.
+    """
+    s = reply.strip()
+    try:
+        items = _json_loads(s)
+        if isinstance(items, list):
+            return items
+    except ValueError:
+        pass
+    first = None
+    i = s.find("[")
+    while i != -1:
+        try:
+            value, end = _JSON_DECODER.raw_decode(s, i)
+        except ValueError:
+            i = s.find("[", i + 1)
+            continue
+        if isinstance(value, list):
+            if value and all(isinstance(it, dict) for it in value):
+                return value
+            if first is None:
+                first = value
+        i = s.find("[", end)
+    return first
+
+
+# ---- RQ retries ----
+# Failures a later attempt can fix. Anything else (missing meeting, no transcript yet, a bad
+# value from the model) fails the same way every time, so it shouldn't be retried.
+TRANSIENT_ERRORS = (
+    openai.APIConnectionError,  # includes APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+    psycopg2.OperationalError,
+    requests.Timeout,
+    requests.ConnectionError,
+)
+
+def retry_transient_only(func):
+    """Job decorator: on a non-transient error, cancel the running RQ job's remaining retries."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except TRANSIENT_ERRORS:
+            raise
+        except Exception:
+            from rq import get_current_job
+            job = get_current_job()  # None when run inline
+            if job is not None:
+                job.retries_left = 0
+            raise
+    return wrapper
+
+
+# ---- LLM result cache (exact match) ----
+# Keyed on sha256(instructions + text) + language so a prompt change never serves
+# stale output. Values are stored encrypted, like the DB columns.
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 86400)))
+
+_redis = None
+
+def _get_redis():
+    """Lazily connect to Redis; returns None if it is not configured / reachable."""
+    global _redis
+    if _redis is None:
+        try:
+            _redis = get_redis_conn_or_raise()
+        except Exception as e:
+            logger.warning("LLM cache disabled, Redis unavailable: %s", e)
+            return None
+    return _redis
+
+def llm_cache_key(kind, text, language, instructions):
+    digest = hashlib.sha256(f"{instructions}\0{text}".encode("utf-8")).hexdigest()
+    return f"llm:{kind}:{language}:{digest}"
+
+def llm_cache_get(key):
+    """Return cached plaintext for key, or None on miss / Redis unavailable."""
+    r = _get_redis()
+    if not r:
+        return None
+    try:
+        val = r.get(key)
+        return decrypt_sensitive_data(val.decode("utf-8")) if val else None
+    except Exception as e:
+        logger.warning("LLM cache get failed: %s", e)
+        return None
+
+def llm_cache_set(key, text):
+    r = _get_redis()
+    if not r or not text:
+        return
+    try:
+        r.setex(key, LLM_CACHE_TTL_SECONDS, encrypt_sensitive_data(text))
+    except Exception as e:
+        logger.warning("LLM cache set failed: %s", e)
+
+
+# ---- Meeting read cache ----
+# Encrypted JSON bodies of the transcript / detail / history endpoints. Entries are short-lived
+# (the transcription worker writes rows without invalidating) and dropped on summary saves.
+
+def meeting_cache_key(kind, ident):
+    """Redis key for a cached read; ident is a meeting id, or a phone (hashed: no PII in keys)."""
+    if kind == "history":
+        ident = hashlib.blake2b(str(ident).encode("utf-8"), digest_size=16).hexdigest()
+    return f"mn:{kind}:{ident}"
+
+def meeting_cache_get(key):
+    """Return the cached JSON body (str), or None on miss / Redis unavailable."""
+    r = _get_redis()
+    if not r:
+        return None
+    try:
+        val = r.get(key)
+        return decrypt_sensitive_data(val.decode("utf-8")) if val else None
+    except Exception as e:
+        logger.warning("Meeting cache get failed: %s", e)
+        return None
+
+def meeting_cache_set(key, body, ttl):
+    r = _get_redis()
+    if not r or not body:
+        return
+    try:
+        r.setex(key, ttl, encrypt_sensitive_data(body))
+    except Exception as e:
+        logger.warning("Meeting cache set failed: %s", e)
+
+def invalidate_meeting_cache(meeting_id=None, phone=None):
+    r = _get_redis()
+    if not r:
+        return
+    keys = []
+    if meeting_id is not None:
+        keys += [meeting_cache_key("detail", meeting_id), meeting_cache_key("transcript", meeting_id)]
+    if phone:
+        keys.append(meeting_cache_key("history", phone))
+    if keys:
+        try:
+            r.delete(*keys)
+        except Exception as e:
+            logger.warning("Meeting cache invalidation failed: %s", e)
+
+
+# ---- DB helpers ----
+
+def fetch_translation_source(meeting_id):
+    """
+    Return (source_text, source_lang) for translation: the summary (in chosen_language) if present,
+    else the transcript (language unknown -> None). Raises LookupError if the meeting is missing.
+    Only the column actually used is decrypted.
+    """
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT summary, transcript, chosen_language FROM meeting_notes WHERE id=%s", (meeting_id,))
+        row = cur.fetchone()
+    if not row:
+        raise LookupError(f"meeting {meeting_id} not found")
+    summary_enc, transcript_enc, chosen_language = row[0], row[1], row[2]
+    if summary_enc:
+        return decrypt_sensitive_data(summary_enc), chosen_language
+    if transcript_enc:
+        return decrypt_sensitive_data(transcript_enc), None
+    return None, None
+
+def save_meeting_summary(meeting_id, summary_text, language):
+    """
+    Encrypt and store a generated summary on the meeting row in one round-trip.
+    Returns summary_generated_at, or None if the meeting no longer exists.
+    """
+    enc_summary = encrypt_sensitive_data(summary_text)
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("UPDATE meeting_notes SET summary=%s, chosen_language=%s, summary_generated_at=now(), job_state='completed' WHERE id=%s RETURNING summary_generated_at, phone",
+                    (enc_summary, language, meeting_id))
+        row = cur.fetchone()
+        conn.commit()
+    if not row:
+        return None
+    invalidate_meeting_cache(meeting_id, phone=row[1])
+    return row[0]
+
+
+# ---- Jobs ----
+
+@retry_transient_only
+def summarize_meeting_job(meeting_id, language):
+    """Summarize a meeting transcript in `language` and store it. Returns {"summary", "language"}."""
+    # Read and release the connection before the (slow) LLM call
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT transcript FROM meeting_notes WHERE id=%s", (meeting_id,))
+        row = cur.fetchone()
+    if not row:
+        raise LookupError(f"meeting {meeting_id} not found")
+    if not row[0]:
+        raise ValueError("transcript not available yet")
+    transcript = decrypt_sensitive_data(row[0])
+
+    cache_key = llm_cache_key("sum", transcript, language, SUMMARY_INSTRUCTIONS)
+    summary_text = llm_cache_get(cache_key)
+    if summary_text is None:
+        summary_text = summarize_text_multilang(transcript, language_code=language, instructions=SUMMARY_INSTRUCTIONS)
+        llm_cache_set(cache_key, summary_text)
+
+    if save_meeting_summary(meeting_id, summary_text, language) is None:
+        logger.warning("summarize_meeting_job: meeting %s vanished before the summary was saved", meeting_id)
+    return {"summary": summary_text, "language": language}
+
+@retry_transient_only
+def translate_meeting_job(meeting_id, to_lang):
+    """Translate a meeting's summary (preferred) or transcript. Returns {"translation", "to"}."""
+    source_text, source_lang = fetch_translation_source(meeting_id)
+    if not source_text:
+        raise ValueError("no text available to translate")
+    if source_lang == to_lang:
+        return {"translation": source_text, "to": to_lang}
+
+    # Use summarizer with translation instructions (safe re-use)
+    cache_key = llm_cache_key("tr", source_text, to_lang, TRANSLATE_INSTRUCTIONS)
+    translated = llm_cache_get(cache_key)
+    if translated is None:
+        translated = summarize_text_multilang(source_text, language_code=to_lang, instructions=TRANSLATE_INSTRUCTIONS, max_tokens=800)
+        llm_cache_set(cache_key, translated)
+    return {"translation": translated, "to": to_lang}
+
+@retry_transient_only
+def extract_actions_job(meeting_id):
+    """Extract action items from a transcript and create tasks. Returns {"created_tasks": [...]}."""
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT transcript, meeting_notes.phone FROM meeting_notes JOIN users ON users.phone = meeting_notes.phone WHERE meeting_notes.id=%s", (meeting_id,))
+        row = cur.fetchone()
+    if not row:
+        raise LookupError(f"meeting {meeting_id} not found")
+    transcript_enc, phone = row[0], row[1]
+    if not transcript_enc:
+        raise ValueError("transcript not available")
+    transcript = decrypt_sensitive_data(transcript_enc)
+
+    # Ask LLM to extract action items as JSON (cached, so a retry doesn't pay for another call)
+    cache_key = llm_cache_key("act", transcript, "en", ACTION_ITEMS_INSTRUCTIONS)
+    ai_resp = llm_cache_get(cache_key)
+    if ai_resp is None:
+        ai_resp = summarize_text_multilang(transcript, language_code="en", instructions=ACTION_ITEMS_INSTRUCTIONS, max_tokens=700, temperature=0.0)
+        llm_cache_set(cache_key, ai_resp)
+    # The model sometimes returns text before/after the JSON array
+    items = _parse_action_items(ai_resp or "")
+    if items is None:
+        # fallback: return raw AI response
+        return {"error": "failed to parse action items", "raw": ai_resp}
+
+    # One multi-row INSERT for all items (associates with user via phone).
+    # Plain-string items become the task title; anything else that isn't an object is skipped.
+    tasks = []
+    for it in items:
+        if isinstance(it, str):
+            it = {"text": it}
+        elif not isinstance(it, dict):
+            logger.warning("Skipping non-object action item for meeting %s: %r", meeting_id, it)
+            continue
+        tasks.append({
+            "title": it.get("text") or it.get("action") or str(it),
+            "due_at": it.get("due"),  # keep ISO date or None
+            "priority": 3,
+            "metadata": {"meeting_id": meeting_id},
+        })
+    created = create_tasks_bulk(phone, tasks, source='mina_ai')
+
+    return {"created_tasks": created}
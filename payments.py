@@ -25,6 +25,17 @@ RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET")
 RAZORPAY_WEBHOOK_SECRET = os.getenv("RAZORPAY_WEBHOOK_SECRET")
 PLATFORM_URL = os.getenv("PLATFORM_URL")  # e.g. https://mina-mom-agent.onrender.com
 
+# Webhook HMAC keyed once at import; each verification copy()s it rather than re-encoding
+# the secret and re-deriving the inner/outer pads
+_RZP_WEBHOOK_HMAC = (
+    hmac.new(RAZORPAY_WEBHOOK_SECRET.encode("utf-8"), digestmod=hashlib.sha256)
+    if RAZORPAY_WEBHOOK_SECRET else None
+)
+
+def new_razorpay_webhook_hmac():
+    """Fresh HMAC-SHA256 context keyed with RAZORPAY_WEBHOOK_SECRET, or None if it isn't set."""
+    return _RZP_WEBHOOK_HMAC.copy() if _RZP_WEBHOOK_HMAC is not None else None
+
 # Create client (singleton)
 _client = None
 def get_client():
@@ -153,53 +164,80 @@ def create_payment_link_for_phone(phone: str, amount_in_rupees: float, currency:
     }
 
 
+def _signature_matches(digest: bytes, header_signature: str) -> bool:
+    """
+    Constant-time check of a raw HMAC-SHA256 digest against the signature header.
+    Razorpay sends lowercase hex; base64 is accepted too (older integrations).
+    Both sides are compared as ASCII bytes with hmac.compare_digest.
+    """
+    provided = (header_signature or "").strip()
+    try:
+        provided_bytes = provided.encode("ascii")
+    except UnicodeEncodeError:
+        return False
+    if hmac.compare_digest(digest.hex().encode("ascii"), provided_bytes.lower()):
+        return True
+    return hmac.compare_digest(base64.b64encode(digest), provided_bytes)
+
+
 def verify_razorpay_webhook(payload_body: bytes, header_signature: str) -> bool:
     """
     Verify Razorpay webhook signature.
     - payload_body: raw request body bytes (important: exact bytes)
     - header_signature: X-Razorpay-Signature header string
     Returns True when verified.
+    The HMAC is computed once and compared in constant time (same check the SDK's
+    verify_webhook_signature does, minus its decode / re-encode of the body).
     """
-    if not RAZORPAY_WEBHOOK_SECRET:
+    mac = new_razorpay_webhook_hmac()
+    if mac is None:
         print("verify_razorpay_webhook: missing RAZORPAY_WEBHOOK_SECRET")
         return False
 
-    # Try SDK verification first (preferred)
-    try:
-        client = get_client()
-        # SDK expects string payload; pass decoded utf-8 string
-        client.utility.verify_webhook_signature(payload_body.decode("utf-8"), header_signature, RAZORPAY_WEBHOOK_SECRET)
-        return True
-    except Exception as e:
-        # SDK verification failed — fall back
-        print("verify_razorpay_webhook: SDK verification failed:", repr(e))
-
-    # Fallback: HMAC-SHA256
     try:
-        # HMAC raw digest
-        digest = hmac.new(RAZORPAY_WEBHOOK_SECRET.encode("utf-8"), payload_body, hashlib.sha256).digest()
-
-        # Try base64 encoding (Razorpay examples often use base64)
-        computed_b64 = base64.b64encode(digest).decode()
-        if hmac.compare_digest(computed_b64, header_signature):
+        mac.update(payload_body)
+        if _signature_matches(mac.digest(), header_signature):
             return True
-
-        # Try hex digest (some integrations/SDKs use hexdigest)
-        computed_hex = hashlib.sha256(payload_body + b"").hexdigest()
-        # the correct hex to compare would be hmac.new(secret, payload, sha256).hexdigest()
-        computed_hex = hmac.new(RAZORPAY_WEBHOOK_SECRET.encode("utf-8"), payload_body, hashlib.sha256).hexdigest()
-        if hmac.compare_digest(computed_hex, header_signature):
-            return True
-
-        # Nope
-        print("verify_razorpay_webhook: fallback verification failed. header:", header_signature, "computed_b64:", computed_b64, "computed_hex:", computed_hex)
+        # never log computed signatures: they'd let anyone reading logs forge this payload
+        print("verify_razorpay_webhook: signature mismatch")
         return False
     except Exception as e:
-        print("verify_razorpay_webhook: fallback exception:", e, traceback.format_exc())
+        print("verify_razorpay_webhook: verification exception:", e, traceback.format_exc())
         return False
 
 
 
+RAZORPAY_WEBHOOK_READ_CHUNK = 64 * 1024
+RAZORPAY_WEBHOOK_MAX_BYTES = 1024 * 1024  # Razorpay events are a few KB
+
+def read_and_verify_razorpay_webhook(stream, header_signature: str, max_bytes: int = RAZORPAY_WEBHOOK_MAX_BYTES):
+    """
+    Read a webhook body from stream in chunks, feeding each into the HMAC as it arrives,
+    so the signature check needs no second pass over a buffered copy.
+    Returns (verified, body) where body is a bytearray of the exact signed bytes, ready for
+    the JSON parse. Raises ValueError when the body is larger than max_bytes.
+    """
+    mac = new_razorpay_webhook_hmac()
+    if mac is None:
+        print("verify_razorpay_webhook: missing RAZORPAY_WEBHOOK_SECRET")
+        return False, bytearray()
+
+    body = bytearray()
+    while True:
+        chunk = stream.read(RAZORPAY_WEBHOOK_READ_CHUNK)
+        if not chunk:
+            break
+        if len(body) + len(chunk) > max_bytes:
+            raise ValueError(f"webhook body exceeds {max_bytes} bytes")
+        mac.update(chunk)
+        body += chunk
+
+    if _signature_matches(mac.digest(), header_signature):
+        return True, body
+    print("verify_razorpay_webhook: signature mismatch")
+    return False, body
+
+
 def handle_webhook_event(event_json: dict) -> dict:
     """
     Clean, idempotent Razorpay webhook handler.
@@ -4,30 +4,59 @@ Simple Redis + RQ helper (safe for web + worker).
 Exports:
   - get_redis_url()
   - get_redis_conn_or_raise()
+  - get_redis_pool(url)
   - get_queue(name="transcribe")
+  - get_job_serializer()
   - redis_url, redis_conn, queue  (for backward compatibility)
 """
 
 import os
+import json
 import logging
-from redis import from_url, RedisError
+import threading
+from redis import Redis, BlockingConnectionPool, RedisError
 from rq import Queue
 
 logger = logging.getLogger(__name__)
 
+# One bounded pool per process, shared by every get_redis_conn_or_raise() caller (web
+# globals, media/meeting job caches, RQ). Checkout waits briefly when all connections are
+# busy instead of opening more, so a burst can't exhaust the Redis server's client limit.
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "32"))
+REDIS_POOL_TIMEOUT_SECONDS = 5
+
+_pools = {}
+_pools_lock = threading.Lock()
+
 def get_redis_url():
     """Return the REDIS_URL env var (None if missing)."""
     url = os.getenv("REDIS_URL")
     return url.strip() if url else None
 
 
+def get_redis_pool(url):
+    """Return the process-wide connection pool for url, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(url)
+        if pool is None:
+            pool = BlockingConnectionPool.from_url(
+                url,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                timeout=REDIS_POOL_TIMEOUT_SECONDS,
+                socket_keepalive=True,
+                decode_responses=False,
+            )
+            _pools[url] = pool
+        return pool
+
+
 def get_redis_conn_or_raise():
-    """Create and return a verified Redis connection."""
+    """Return a verified Redis client backed by the shared connection pool."""
     url = get_redis_url()
     if not url:
         raise RuntimeError("REDIS_URL not set in environment.")
     try:
-        r = from_url(url, decode_responses=False)
+        r = Redis(connection_pool=get_redis_pool(url))
         r.ping()
         logger.info("✅ Connected to Redis at %s", url)
         return r
@@ -36,10 +65,35 @@ def get_redis_conn_or_raise():
         raise
 
 
+class CompactJSONSerializer:
+    """
+    RQ job serializer: compact JSON instead of pickle (smaller payloads, no pickle on the wire).
+    Non-JSON values in job results (datetimes, Decimals) are stored as strings.
+    """
+    @staticmethod
+    def dumps(obj):
+        return json.dumps(obj, separators=(",", ":"), default=str).encode("utf-8")
+
+    @staticmethod
+    def loads(data):
+        return json.loads(data.decode("utf-8") if isinstance(data, bytes) else data)
+
+
+def get_job_serializer():
+    """
+    Serializer shared by the web enqueuers and worker_runner.
+    RQ_SERIALIZER=json opts in to CompactJSONSerializer; web and workers must agree, and
+    pickled jobs already queued can't be read after switching, so drain the queue first.
+    """
+    if os.getenv("RQ_SERIALIZER", "").strip().lower() == "json":
+        return CompactJSONSerializer
+    return None  # RQ default (pickle)
+
+
 def get_queue(name: str = "default"):
     """Return an RQ Queue bound to a Redis connection."""
     rc = get_redis_conn_or_raise()
-    return Queue(name, connection=rc)
+    return Queue(name, connection=rc, serializer=get_job_serializer())
 
 
 # module-level convenience
@@ -63,7 +63,7 @@ def get_all_active_users():
         with get_conn() as conn, conn.cursor() as cur:
             cur.execute("SELECT phone FROM users WHERE created_at IS NOT NULL")
             rows = cur.fetchall()
-            return [row[0] if hasattr(row, '__getitem__') else row.phone for row in rows]
+            return [row[0] for row in rows]
     except Exception as e:
         print(f"Error getting active users: {e}")
         return []
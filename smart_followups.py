@@ -6,37 +6,38 @@ The killer feature for Indian market - automatic follow-ups with gamification
 import os
 from datetime import datetime, timedelta
 import pytz
-from db import get_conn, get_user_by_phone
-from utils import send_whatsapp
+from db import get_conn
+from utils import send_whatsapp, normalize_phone_for_db
 from psycopg2.extras import RealDictCursor
 
 def get_user_completion_score(phone, days=7):
     """Calculate user's task completion score for last N days"""
+    phone = normalize_phone_for_db(phone)
+    ist = pytz.timezone('Asia/Kolkata')
+    now = datetime.now(ist)
+    start_date = now - timedelta(days=days)
+
     with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
-        user = get_user_by_phone(phone)
-        if not user:
-            return None
-        
-        ist = pytz.timezone('Asia/Kolkata')
-        now = datetime.now(ist)
-        start_date = now - timedelta(days=days)
-        
-        # Get task stats
+        # User lookup + task stats in one round-trip (aggregates always return a row)
         cur.execute("""
             SELECT 
-                COUNT(*) FILTER (WHERE status='done') as completed,
-                COUNT(*) FILTER (WHERE status='open') as pending,
-                COUNT(*) FILTER (WHERE status='open' AND due_at < now()) as overdue,
-                COUNT(*) as total
-            FROM tasks
-            WHERE user_id = %s 
-            AND created_at >= %s
-            AND deleted = false
-        """, (user['id'], start_date))
+                EXISTS (SELECT 1 FROM users WHERE phone = %s) as user_exists,
+                COUNT(t.id) FILTER (WHERE t.status='done') as completed,
+                COUNT(t.id) FILTER (WHERE t.status='open') as pending,
+                COUNT(t.id) FILTER (WHERE t.status='open' AND t.due_at < now()) as overdue,
+                COUNT(t.id) as total
+            FROM users u
+            JOIN tasks t ON t.user_id = u.id
+            WHERE u.phone = %s
+            AND t.created_at >= %s
+            AND t.deleted = false
+        """, (phone, phone, start_date))
         
         stats = cur.fetchone()
+        if not stats['user_exists']:
+            return None
         
-        if not stats or stats['total'] == 0:
+        if stats['total'] == 0:
             return {
                 'score': 0,
                 'completed': 0,
@@ -1,14 +1,43 @@
 # utils.py
 import re
+import struct
 from datetime import datetime, timezone
 import os
+import time
+import threading
+import functools
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse, unquote
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from twilio.rest import Client as TwilioClient
 
-# Use consistent temp directory
-TEMP_DIR = os.getenv("TEMP_DIR", os.getcwd())
+# Use consistent temp directory. Uploads/downloads here are scratch files handed to the
+# worker (a failure just reprocesses), so prefer RAM-backed tmpfs when the host has one.
+TEMP_DIR = os.getenv("TEMP_DIR") or ("/dev/shm/mina" if os.path.isdir("/dev/shm") else os.getcwd())
 os.makedirs(TEMP_DIR, exist_ok=True)
 
+def temp_dir_free_bytes(path: str = TEMP_DIR) -> int:
+    """Bytes available to unprivileged writers in path, TEMP_DIR by default (tmpfs is usually small)."""
+    st = os.statvfs(path)
+    return st.f_bavail * st.f_frsize
+
+# One pooled HTTP session for all outbound fetches (Twilio media, debug probes), so repeat
+# requests to the same host reuse the TCP/TLS connection instead of handshaking each time
+HTTP_SESSION = requests.Session()
+_http_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=Retry(total=2, backoff_factor=0.2))
+HTTP_SESSION.mount("https://", _http_adapter)
+HTTP_SESSION.mount("http://", _http_adapter)
+
+# Background pool for outbound WhatsApp sends so request handlers don't wait on Twilio
+WHATSAPP_SEND_WORKERS = int(os.getenv("WHATSAPP_SEND_WORKERS", "16"))
+_WHATSAPP_POOL = ThreadPoolExecutor(
+    max_workers=WHATSAPP_SEND_WORKERS,
+    thread_name_prefix="wa-send"
+)
+
 
 # map common content-types to extensions
 _CONTENT_TYPE_TO_EXT = {
@@ -26,6 +55,11 @@ _CONTENT_TYPE_TO_EXT = {
     "application/pdf": ".pdf",
 }
 
+# Precompiled patterns for the per-webhook helpers below
+_UNSAFE_FILENAME_CHARS_RE = re.compile(r'[^A-Za-z0-9_.-]')
+_FORMAT_QUERY_RE = re.compile(r"(?:format|type)=([a-z0-9]+)", re.I)
+_NON_DIGITS_RE = re.compile(r"\D")
+
 def get_ext_from_content_type(content_type: str) -> str | None:
     """
     Return a file extension (including the dot) for a Content-Type header,
@@ -35,7 +69,7 @@ def get_ext_from_content_type(content_type: str) -> str | None:
     if not content_type:
         return None
     # sometimes content_type has charset like 'audio/mpeg; charset=utf-8'
-    ct = content_type.split(";")[0].strip().lower()
+    ct = content_type.split(";", 1)[0].strip().lower()
     return _CONTENT_TYPE_TO_EXT.get(ct)
 
 def safe_filename_from_url(url: str, fallback_ext: str = ".bin") -> str:
@@ -51,13 +85,13 @@ def safe_filename_from_url(url: str, fallback_ext: str = ".bin") -> str:
         parsed = urlparse(unquote(url))
         basename = os.path.basename(parsed.path) or ""
         # keep only safe chars
-        basename = re.sub(r'[^A-Za-z0-9_.-]', '_', basename)
+        basename = _UNSAFE_FILENAME_CHARS_RE.sub('_', basename)
         name, ext = os.path.splitext(basename)
         if ext:
             return f"{name}{ext}"
         # try to infer from query parameters (e.g., ?format=m4a)
         query = parsed.query or ""
-        m = re.search(r"(?:format|type)=([a-z0-9]+)", query, flags=re.I)
+        m = _FORMAT_QUERY_RE.search(query)
         if m:
             return f"{name}.{m.group(1)}"
     except Exception:
@@ -93,28 +127,234 @@ def normalize_phone_for_db(raw_phone: str) -> str:
     elif p.isdigit():
         digits = p
     else:
-        digits = re.sub(r"\D", "", p)
+        digits = _NON_DIGITS_RE.sub("", p)
 
     return f"whatsapp:+{digits}"
 
+class TTLCache:
+    """
+    Small thread-safe in-process cache with per-entry expiry and a size bound
+    (oldest entries are evicted first). For hot per-user lookups on the webhook path.
+    """
+    _MISSING = object()
+
+    def __init__(self, maxsize=10000, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, self._MISSING)
+            if item is self._MISSING:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
 def now_utc():
     """Return current UTC datetime."""
     return datetime.now(timezone.utc)
 
+# Direct Mutagen reader per extension: skips mutagen.File()'s probe of every supported
+# format. Modules are imported on first use.
+_MUTAGEN_READER_BY_EXT = {
+    "mp3": ("mutagen.mp3", "MP3"),
+    "m4a": ("mutagen.mp4", "MP4"),
+    "mp4": ("mutagen.mp4", "MP4"),
+    "aac": ("mutagen.aac", "AAC"),
+    "ogg": ("mutagen.oggopus", "OggOpus"),  # WhatsApp voice notes are Opus-in-Ogg
+    "opus": ("mutagen.oggopus", "OggOpus"),
+    "wav": ("mutagen.wave", "WAVE"),
+}
+
+# ---- Header-only duration probes ----
+# Read the few bytes that hold the duration instead of having Mutagen parse the container
+# and its tags. Each probe takes a seekable binary file and returns seconds or None.
+
+_OGG_TAIL_BYTES = 64 * 1024
+
+def _fast_duration_mp4(f):
+    """Walk top-level MP4 atoms to moov/mvhd and return duration / timescale."""
+    f.seek(0, os.SEEK_END)
+    end = f.tell()
+    pos = 0
+    while pos + 8 <= end:
+        f.seek(pos)
+        size, kind = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return None
+        if kind == b"moov":
+            child, moov_end = pos + header, pos + size
+            while child + 8 <= moov_end:
+                f.seek(child)
+                csize, ckind = struct.unpack(">I4s", f.read(8))
+                if csize < 8:
+                    return None
+                if ckind == b"mvhd":
+                    version = f.read(4)[0]
+                    if version == 1:
+                        timescale, duration = struct.unpack(">16xIQ", f.read(28))
+                    else:
+                        timescale, duration = struct.unpack(">8xII", f.read(16))
+                    return duration / timescale if timescale else None
+                child += csize
+            return None
+        pos += size
+    return None
+
+def _fast_duration_ogg(f):
+    """Duration from the last Ogg page's granule position (48 kHz for Opus, header rate for Vorbis)."""
+    head = f.read(28 + 255)
+    if head[:4] != b"OggS":
+        return None
+    serial = head[14:18]
+    payload = head[27 + head[26]:]
+    if payload[:8] == b"OpusHead":
+        pre_skip = struct.unpack("<H", payload[10:12])[0]
+        rate = 48000
+    elif payload[:7] == b"\x01vorbis":
+        pre_skip = 0
+        rate = struct.unpack("<I", payload[12:16])[0]
+    else:
+        return None
+
+    f.seek(0, os.SEEK_END)
+    f.seek(max(0, f.tell() - _OGG_TAIL_BYTES))
+    tail = f.read()
+    i = tail.rfind(b"OggS")
+    while i >= 0:
+        page = tail[i:i + 27]
+        if len(page) == 27 and page[4] == 0 and page[14:18] == serial:
+            granule = struct.unpack("<q", page[6:14])[0]
+            if granule >= 0:
+                return max(granule - pre_skip, 0) / rate if rate else None
+        i = tail.rfind(b"OggS", 0, i)
+    return None
+
+_FAST_DURATION_BY_EXT = {
+    "m4a": _fast_duration_mp4,
+    "mp4": _fast_duration_mp4,
+    "ogg": _fast_duration_ogg,
+    "opus": _fast_duration_ogg,
+}
+
+def _fast_duration(source, ext):
+    probe = _FAST_DURATION_BY_EXT.get(ext)
+    if not probe:
+        return None
+    try:
+        if isinstance(source, str):
+            with open(source, "rb") as f:
+                return probe(f)
+        length = probe(source)
+        source.seek(0)
+        return length
+    except (OSError, struct.error, IndexError):
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return None
+
+def read_audio_length(source, ext=None):
+    """
+    Return the duration in seconds of a path or seekable file object, or None.
+    m4a/mp4 and ogg/opus are read from their headers directly; otherwise (or if that fails)
+    uses the Mutagen reader for `ext` (defaults to the path's extension), then falls back to
+    generic mutagen.File() detection if that reader rejects the file.
+    """
+    import importlib
+    from mutagen import File as MutagenFile
+
+    if ext is None and isinstance(source, str):
+        ext = os.path.splitext(source)[1]
+    ext = (ext or "").lstrip(".").lower()
+    length = _fast_duration(source, ext)
+    if length:
+        return float(length)
+    reader = _MUTAGEN_READER_BY_EXT.get(ext)
+    if reader:
+        try:
+            audio = getattr(importlib.import_module(reader[0]), reader[1])(source)
+            if getattr(audio.info, "length", None):
+                return float(audio.info.length)
+        except Exception:
+            if hasattr(source, "seek"):
+                source.seek(0)
+    audio = MutagenFile(source)
+    if audio and getattr(audio.info, "length", None):
+        return float(audio.info.length)
+    return None
+
 def compute_audio_duration_seconds(file_path):
     """Compute audio duration safely using Mutagen."""
     try:
-        from mutagen import File as MutagenFile
-        audio = MutagenFile(file_path)
-        if not audio or not getattr(audio.info, 'length', None):
-            return 0.0
-        return round(audio.info.length, 2)
+        length = read_audio_length(file_path)
+        return round(length, 2) if length else 0.0
     except Exception as e:
         print("⚠️ Could not compute duration:", e)
         return 0.0
 
 
 
+@functools.lru_cache(maxsize=1)
+def twilio_credentials():
+    """
+    (account_sid, auth_token, whatsapp_from) from the environment, resolved on first use
+    (after the app has loaded .env) and reused for every send / media fetch.
+    """
+    from_number = os.getenv("TWILIO_WHATSAPP_FROM") or os.getenv("TWILIO_FROM") or "whatsapp:+14155238886"
+    return os.getenv("TWILIO_ACCOUNT_SID"), os.getenv("TWILIO_AUTH_TOKEN"), normalize_phone_for_db(from_number)
+
+def _twilio_auth_for(url):
+    """
+    (account_sid, auth_token) for a URL on twilio.com or one of its subdomains, else None.
+    Media URLs come from unauthenticated webhook posts, so the credentials must never be
+    sent to any other host. Also None when the credentials aren't configured.
+    """
+    host = urlparse(url).hostname or ""
+    if host != "twilio.com" and not host.endswith(".twilio.com"):
+        return None
+    account_sid, auth_token, _ = twilio_credentials()
+    return (account_sid, auth_token) if account_sid and auth_token else None
+
+TWILIO_HTTP_TIMEOUT_SECONDS = 30
+
+@functools.lru_cache(maxsize=1)
+def get_twilio_client():
+    """
+    Process-wide Twilio REST client, or None without credentials. Its HTTP client keeps one
+    pooled keep-alive session (sized for the background send pool), so sends reuse TLS connections.
+    """
+    from twilio.http.http_client import TwilioHttpClient
+
+    account_sid, auth_token, _ = twilio_credentials()
+    if not account_sid or not auth_token:
+        return None
+    http_client = TwilioHttpClient(pool_connections=True, timeout=TWILIO_HTTP_TIMEOUT_SECONDS)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(32, WHATSAPP_SEND_WORKERS))
+    http_client.session.mount("https://", adapter)
+    return TwilioClient(account_sid, auth_token, http_client=http_client)
+
 def send_whatsapp(to_phone: str, message: str, max_retries: int = 3) -> bool:
     """
     Send a WhatsApp message using Twilio API with retry logic.
@@ -128,9 +368,7 @@ def send_whatsapp(to_phone: str, message: str, max_retries: int = 3) -> bool:
     """
     import time
     
-    account_sid = os.getenv("TWILIO_ACCOUNT_SID")
-    auth_token = os.getenv("TWILIO_AUTH_TOKEN")
-    from_whatsapp_number = os.getenv("TWILIO_WHATSAPP_FROM") or os.getenv("TWILIO_FROM") or "whatsapp:+14155238886"
+    account_sid, auth_token, from_whatsapp_number = twilio_credentials()
 
     if not to_phone:
         print("⚠️ send_whatsapp called with no recipient phone number. Message not sent.")
@@ -141,7 +379,7 @@ def send_whatsapp(to_phone: str, message: str, max_retries: int = 3) -> bool:
         return False
 
     to_whatsapp_number = normalize_phone_for_db(to_phone)
-    client = TwilioClient(account_sid, auth_token)
+    client = get_twilio_client()
 
     for attempt in range(max_retries):
         try:
@@ -167,3 +405,34 @@ def send_whatsapp(to_phone: str, message: str, max_retries: int = 3) -> bool:
     
     print(f"❌ Failed to send WhatsApp message after {max_retries} attempts")
     return False
+
+
+# Optional RQ queue for outbound sends (add it to the workers' WORKER_QUEUES): queued messages
+# survive a web restart and are spread across workers. Unset -> in-process thread pool.
+WHATSAPP_OUTBOUND_QUEUE = os.getenv("WHATSAPP_OUTBOUND_QUEUE")
+WHATSAPP_SEND_JOB_TIMEOUT = 30
+
+_outbound_queue = None
+
+def _get_outbound_queue():
+    global _outbound_queue
+    if _outbound_queue is None:
+        from redis_conn import get_queue
+        _outbound_queue = get_queue(WHATSAPP_OUTBOUND_QUEUE)
+    return _outbound_queue
+
+def send_whatsapp_async(to_phone: str, message: str, max_retries: int = 3):
+    """
+    Fire-and-forget variant of send_whatsapp.
+    Enqueues the send on WHATSAPP_OUTBOUND_QUEUE when configured (returns the RQ job), else runs it
+    on a background thread (returns a Future resolving to its bool result).
+    """
+    if WHATSAPP_OUTBOUND_QUEUE:
+        try:
+            return _get_outbound_queue().enqueue(
+                send_whatsapp, to_phone, message, max_retries,
+                job_timeout=WHATSAPP_SEND_JOB_TIMEOUT, result_ttl=0
+            )
+        except Exception as e:
+            print(f"⚠️ Outbound queue unavailable, sending in-process: {e}")
+    return _WHATSAPP_POOL.submit(send_whatsapp, to_phone, message, max_retries)
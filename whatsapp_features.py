@@ -9,9 +9,8 @@ Advanced WhatsApp Features for MinA
 
 import os
 import json
-import requests
 from datetime import datetime, timedelta
-from utils import send_whatsapp 
+from utils import send_whatsapp, HTTP_SESSION, _twilio_auth_for
 from db import get_conn, create_task, get_user_by_phone
 
 
@@ -155,7 +154,7 @@ def handle_location_message(phone, latitude, longitude, address=None):
             try:
                 # Use a geocoding service (you can use Google Maps API, OpenStreetMap, etc.)
                 geocode_url = f"https://api.opencagedata.com/geocode/v1/json?q={latitude}+{longitude}&key={os.getenv('OPENCAGE_API_KEY')}"
-                resp = requests.get(geocode_url, timeout=10)
+                resp = HTTP_SESSION.get(geocode_url, timeout=10)
                 if resp.status_code == 200:
                     data = resp.json()
                     if data['results']:
@@ -276,14 +275,16 @@ def extract_text_from_image(image_url):
             print("❌ OPENAI_API_KEY not found")
             return None
         
-        # Download image from Twilio with authentication
-        account_sid = os.getenv("TWILIO_ACCOUNT_SID")
-        auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+        # Download image from Twilio with authentication (only ever sent to Twilio hosts)
+        auth = _twilio_auth_for(image_url)
+        if auth is None:
+            print("❌ Not downloading image: not a twilio.com URL, or Twilio credentials missing")
+            return None
         
         print(f"📥 Downloading image from: {image_url[:50]}...")
         
         # Add timeout and better error handling
-        response = requests.get(image_url, auth=(account_sid, auth_token), timeout=30)
+        response = HTTP_SESSION.get(image_url, auth=auth, timeout=30)
         if response.status_code != 200:
             print(f"❌ Failed to download image: HTTP {response.status_code}")
             return None
@@ -23,6 +23,8 @@ from redis import Redis
 from rq import Worker, Queue
 from rq.connections import Connection
 
+from redis_conn import get_job_serializer
+
 
 # Configure logging
 LOG_LEVEL = os.getenv("WORKER_LOG_LEVEL", "INFO").upper()
@@ -73,7 +75,8 @@ def run_worker():
 
     # Create worker
     with Connection(redis_conn):
-        worker = Worker(map(Queue, queues), name=WORKER_NAME)
+        serializer = get_job_serializer()
+        worker = Worker([Queue(q, serializer=serializer) for q in queues], name=WORKER_NAME, serializer=serializer)
         # Setup graceful shutdown via signals
         def _shutdown(signum, frame):
             log.info("Received shutdown signal %s — stopping worker gracefully...", signum)